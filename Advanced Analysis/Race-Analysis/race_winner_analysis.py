@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
@@ -9,7 +12,39 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style (optional, as this script focuses on text output)
 fastf1.plotting.setup_mpl()
 
-def analyze_winner_performance(year, grand_prix, winner_driver_code):
+# Shared pool for overlapping session loads - loading is network/disk bound,
+# so callers analyzing several races can prefetch them concurrently.
+_SESSION_POOL = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 4) * 2))
+
+
+def _load_race_session(year, grand_prix):
+    session = fastf1.get_session(year, grand_prix, 'Race')
+    session.load(laps=True, telemetry=False, weather=False, messages=True)
+    return session
+
+
+def prefetch_session(year, grand_prix):
+    """
+    Starts loading a race session in the background and returns a Future.
+    Pass future.result() to analyze_winner_performance via `race` to overlap
+    network latency when analyzing many races.
+    """
+    return _SESSION_POOL.submit(_load_race_session, year, grand_prix)
+
+def _slope(x, y):
+    """
+    Closed-form slope of a degree-1 least-squares fit. Equivalent to
+    np.polyfit(x, y, 1)[0] without building a Vandermonde matrix and
+    calling LAPACK for a straight line.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    xm = x.mean()
+    ym = y.mean()
+    return ((x - xm) * (y - ym)).sum() / ((x - xm) ** 2).sum()
+
+
+def analyze_winner_performance(year, grand_prix, winner_driver_code, race=None):
     """
     Analyzes why a specific driver won a Grand Prix, covering various aspects
     of race performance.
@@ -18,13 +53,15 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
         year (int): The year of the Grand Prix.
         grand_prix (str): The name of the Grand Prix.
         winner_driver_code (str): The three-letter code of the winning driver.
+        race (fastf1.core.Session, optional): An already-loaded race session,
+            e.g. from prefetch_session(). Loaded here if not provided.
     """
     print(f"\n--- Analyzing Why {winner_driver_code} Won the {grand_prix} {year} Grand Prix ---")
 
     try:
-        # Load session data
-        race = fastf1.get_session(year, grand_prix, 'Race')
-        race.load(laps=True, telemetry=False, weather=False, messages=True)
+        # Load session data (unless a prefetched session was passed in)
+        if race is None:
+            race = _load_race_session(year, grand_prix)
 
         results = race.results
         laps = race.laps
@@ -37,21 +74,32 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
             return
 
         # Get top 3-5 finishers excluding winner for comparison
-        top_finishers = results.sort_values(by='Position').head(5)
+        top_finishers = results.nsmallest(5, 'Position')
         rival_drivers = top_finishers.loc[top_finishers['Abbreviation'] != winner_driver_code]['Abbreviation'].tolist()
         all_drivers_to_analyze = [winner_driver_code] + rival_drivers
 
         print(f"Comparing {winner_driver_code} against rivals: {', '.join(rival_drivers)}")
 
+        # Group the laps by driver once - pick_driver re-scans the full laps
+        # frame on every call, which adds up across the sections below.
+        empty_laps = laps.iloc[0:0]
+        driver_groups = dict(list(laps.groupby('Driver', sort=False)))
+
         # --- 1. Pace Advantage ---
         print("\n--- 1. Pace Advantage ---")
-        driver_paces = {}
-        for driver in all_drivers_to_analyze:
-            driver_laps = laps.pick_driver(driver).pick_accurate()
-            if not driver_laps.empty:
-                driver_paces[driver] = driver_laps['LapTime'].dt.total_seconds().median()
-            else:
-                driver_paces[driver] = np.nan
+        # One groupby pass yields both the median (pace) and std (consistency)
+        # used by sections 1 and 3.
+        accurate_laps = laps.loc[laps['IsAccurate'] == True]
+        lap_time_stats = (
+            accurate_laps
+            .assign(LapTimeSeconds=accurate_laps['LapTime'].dt.total_seconds())
+            .groupby('Driver')['LapTimeSeconds']
+            .agg(['median', 'std'])
+        )
+        driver_paces = {
+            driver: lap_time_stats['median'].get(driver, np.nan)
+            for driver in all_drivers_to_analyze
+        }
 
         winner_pace = driver_paces.get(winner_driver_code)
         if pd.isna(winner_pace):
@@ -76,16 +124,18 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
         # --- 2. Strategy (Pit Stops & Tires) ---
         print("\n--- 2. Strategy (Pit Stops & Tires) ---")
         for driver in all_drivers_to_analyze:
-            driver_laps_all = laps.pick_driver(driver)
+            driver_laps_all = driver_groups.get(driver, empty_laps)
             
             # Count pit stops by checking PitInTime
             pit_stops_count = driver_laps_all['PitInTime'].count()
 
-            # Calculate stints using the provided robust method
+            # Stint lengths via a single size() count - no per-column null
+            # counting over a 4-column intermediate
             if not driver_laps_all.empty:
-                driver_stints = driver_laps_all[["Driver", "Stint", "Compound", "LapNumber"]]
-                driver_stints = driver_stints.groupby(["Driver", "Stint", "Compound"]).count().reset_index()
-                driver_stints = driver_stints.rename(columns={"LapNumber": "StintLength"})
+                driver_stints = (
+                    driver_laps_all.groupby(["Stint", "Compound"])
+                    .size().rename("StintLength").reset_index()
+                )
             else:
                 driver_stints = pd.DataFrame()
 
@@ -106,14 +156,13 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
 
         # --- 3. Consistency ---
         print("\n--- 3. Consistency ---")
-        driver_consistency = {}
-        for driver in all_drivers_to_analyze:
-            driver_laps_for_consistency = laps.pick_driver(driver).pick_accurate()
-            if not driver_laps_for_consistency.empty and len(driver_laps_for_consistency) > 1:
-                driver_consistency[driver] = driver_laps_for_consistency['LapTime'].dt.total_seconds().std()
-            else:
-                driver_consistency[driver] = np.nan
-        
+        # std from the shared groupby pass above; NaN when a driver has fewer
+        # than two accurate laps, matching the old per-driver guard.
+        driver_consistency = {
+            driver: lap_time_stats['std'].get(driver, np.nan)
+            for driver in all_drivers_to_analyze
+        }
+
         winner_consistency = driver_consistency.get(winner_driver_code)
         if pd.isna(winner_consistency):
             print(f"{winner_driver_code}: Insufficient lap data for consistency analysis.")
@@ -138,13 +187,14 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
         driver_degradation = {}
         for driver in all_drivers_to_analyze:
             # Get all laps for the current driver
-            all_driver_laps = laps.pick_driver(driver)
+            all_driver_laps = driver_groups.get(driver, empty_laps)
 
-            # Calculate stints for the current driver using the robust method
+            # Stint summary for the current driver via the same size() count
             if not all_driver_laps.empty:
-                driver_stints_summary = all_driver_laps[["Driver", "Stint", "Compound", "LapNumber"]]
-                driver_stints_summary = driver_stints_summary.groupby(["Driver", "Stint", "Compound"]).count().reset_index()
-                driver_stints_summary = driver_stints_summary.rename(columns={"LapNumber": "StintLength"})
+                driver_stints_summary = (
+                    all_driver_laps.groupby(["Stint", "Compound"])
+                    .size().rename("StintLength").reset_index()
+                )
             else:
                 driver_stints_summary = pd.DataFrame()
 
@@ -171,8 +221,7 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
                     # print(f"Debug: lap_times_seconds type: {type(lap_times_seconds)}, shape: {lap_times_seconds.shape}, content: {lap_times_seconds.tolist()}")
 
                     if len(relative_lap_numbers) > 1 and not relative_lap_numbers.empty and not lap_times_seconds.empty and len(relative_lap_numbers) == len(lap_times_seconds):
-                        slope, _ = np.polyfit(relative_lap_numbers, lap_times_seconds, 1)
-                        degradation_rates.append(slope)
+                        degradation_rates.append(_slope(relative_lap_numbers, lap_times_seconds))
                     else:
                         print("Debug: Skipping polyfit due to empty or mismatched length arrays.")
             if degradation_rates:
@@ -200,7 +249,7 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
 
         # --- 5. Overtakes/Defensive Driving ---
         print("\n--- 5. Overtakes/Defensive Driving ---")
-        winner_laps = laps.pick_driver(winner_driver_code)
+        winner_laps = driver_groups.get(winner_driver_code, empty_laps)
         if not winner_laps.empty:
             start_pos = winner_laps.iloc[0]['Position']
             end_pos = winner_laps.iloc[-1]['Position']
@@ -215,9 +264,11 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
                 print("  - Maintained starting position (or net zero change).")
             
             # Simple overtake count (can be inaccurate, just looking at position changes)
-            position_changes = winner_laps['Position'].diff().fillna(0)
-            overtakes_made = (position_changes < 0).sum() # Position decreases means overtake
-            positions_lost = (position_changes > 0).sum() # Position increases means lost position
+            # Diff the raw position array once instead of building pandas
+            # Series intermediates for diff/fillna and two comparisons.
+            position_changes = np.diff(winner_laps['Position'].to_numpy(dtype=np.float64))
+            overtakes_made = int((position_changes < 0).sum()) # Position decreases means overtake
+            positions_lost = int((position_changes > 0).sum()) # Position increases means lost position
 
             print(f"  - Estimated Overtakes Made: {overtakes_made}")
             print(f"  - Estimated Positions Lost: {positions_lost}")
@@ -234,11 +285,17 @@ def analyze_winner_performance(year, grand_prix, winner_driver_code):
 
         # --- 6. Safety Car/VSC/Red Flag Incidents ---
         print("\n--- 6. Safety Car/VSC/Red Flag Incidents ---")
-        safety_car_events = messages[messages['Category'].isin(['SafetyCar', 'VirtualSafetyCar', 'RedFlag'])]
+        incident_mask = messages['Category'].isin({'SafetyCar', 'VirtualSafetyCar', 'RedFlag'})
+        safety_car_events = messages[incident_mask]
         if not safety_car_events.empty:
             print("Race Control Incidents:")
-            for _, msg in safety_car_events.iterrows():
-                print(f"  - {msg['Time'].strftime('%H:%M:%S')} - {msg['Category']}: {msg['Message']}")
+            # Format all timestamps in one vectorized pass rather than calling
+            # strftime on boxed Timestamp objects row by row
+            time_strings = safety_car_events['Time'].dt.strftime('%H:%M:%S')
+            for time_str, category, message in zip(
+                time_strings, safety_car_events['Category'], safety_car_events['Message']
+            ):
+                print(f"  - {time_str} - {category}: {message}")
             
             # Assess impact (simplified)
             print("Conclusion: (Assessing the exact impact of these events on the winner vs. rivals would require detailed lap-by-lap position and time delta analysis around the incident laps.)")
@@ -1,59 +1,64 @@
+import functools
+import os
+import pickle
+import time
+
 import fastf1
-import fastf1.plotting
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 # Enable the cache for faster data loading on subsequent runs
 fastf1.Cache.enable_cache('cache/')
 
-# Set up plotting style
-fastf1.plotting.setup_mpl()
+# The schedule changes weekly at most; an hour of staleness is fine
+SCHEDULE_TTL = 3600
+_schedule_cache = {}
 
-def get_driver_paces(year, grand_prix, driver_code):
+def get_event_schedule_cached(year):
     """
-    Helper function to get qualifying and race pace for a single driver.
-    Returns a tuple (qualifying_pace, race_pace) or (None, None) if data is not available.
+    Returns the event schedule for a year, cached in-process and persisted
+    to a pickle sidecar so other runs within the TTL skip the fetch too.
     """
-    qualifying_pace = None
-    race_pace = None
+    now = time.time()
+    cached = _schedule_cache.get(year)
+    if cached is not None and now - cached[0] < SCHEDULE_TTL:
+        return cached[1]
 
+    sidecar = os.path.join('cache', f'schedule_{year}.pkl')
     try:
-        # Load Qualifying session
-        qualifying_session = fastf1.get_session(year, grand_prix, 'Qualifying')
-        qualifying_session.load(telemetry=False, weather=False, messages=False)
-        qualifying_laps = qualifying_session.laps.pick_driver(driver_code)
-        if not qualifying_laps.empty:
-            fastest_qualifying_lap = qualifying_laps.pick_fastest()
-            if fastest_qualifying_lap is not None:
-                qualifying_pace = fastest_qualifying_lap['LapTime'].total_seconds()
-
-        # Load Race session
-        race_session = fastf1.get_session(year, grand_prix, 'Race')
-        race_session.load(telemetry=False, weather=False, messages=False)
-        race_laps = race_session.laps.pick_driver(driver_code)
-
-        valid_race_laps = race_laps.loc[
-            (race_laps['IsAccurate'] == True) &
-            (race_laps['LapTime'].notna()) &
-            (race_laps['PitInTime'].isna()) &
-            (race_laps['PitOutTime'].isna())
-        ].copy()
-
-        if not valid_race_laps.empty:
-            valid_race_laps['LapTime(s)'] = valid_race_laps['LapTime'].dt.total_seconds()
-            race_pace = valid_race_laps['LapTime(s)'].median()
-
-    except Exception as e:
-        print(f"Could not load data for {driver_code} in {year} {grand_prix}: {e}")
+        if os.path.exists(sidecar) and now - os.path.getmtime(sidecar) < SCHEDULE_TTL:
+            with open(sidecar, 'rb') as f:
+                schedule = pickle.load(f)
+            _schedule_cache[year] = (now, schedule)
+            return schedule
+    except (OSError, pickle.PickleError):
+        pass
 
-    return qualifying_pace, race_pace
+    schedule = fastf1.get_event_schedule(year)
+    _schedule_cache[year] = (now, schedule)
+    try:
+        with open(sidecar, 'wb') as f:
+            pickle.dump(schedule, f)
+    except OSError:
+        pass
+    return schedule
+
+@functools.lru_cache(maxsize=8)
+def load_session(year, grand_prix, session_type):
+    """
+    Loads a session once per (year, grand prix, session type) and memoizes
+    the parsed object, so per-driver helpers don't re-load and re-parse the
+    same session over and over.
+    """
+    session = fastf1.get_session(year, grand_prix, session_type)
+    session.load(telemetry=False, weather=False, messages=False)
+    return session
 
 def get_most_recent_completed_race(year):
     """
     Finds the most recently completed race from the schedule.
     """
-    schedule = fastf1.get_event_schedule(year)
+    schedule = get_event_schedule_cached(year)
     today = pd.to_datetime('today').date()
     # Filter for events that have already occurred
     completed_races = schedule[schedule['EventDate'].dt.date < today].copy()
@@ -63,7 +68,7 @@ def get_most_recent_completed_race(year):
     most_recent_race = completed_races.iloc[-1]
     return most_recent_race['EventName'], most_recent_race['RoundNumber']
 
-def analyze_quali_race_pace_delta(year, grand_prix):
+def analyze_quali_race_pace_delta(year, grand_prix, show_plots=True):
     """
     Analyzes the percentage difference between qualifying and race pace for all drivers
     in a given Grand Prix.
@@ -71,22 +76,59 @@ def analyze_quali_race_pace_delta(year, grand_prix):
     Args:
         year (int): The year of the Grand Prix.
         grand_prix (str): The name of the Grand Prix.
+        show_plots (bool): Render the delta chart. Disable for headless batch
+            runs that only need the printed insights.
     """
     print(f"\n--- Analyzing Qualifying vs. Race Pace Delta for {year} {grand_prix} ---")
 
+    # Load each session exactly once and share them across the driver loop
     try:
-        race_session = fastf1.get_session(year, grand_prix, 'Race')
-        race_session.load(telemetry=False, weather=False, messages=False)
-        driver_codes = race_session.results['Abbreviation'].tolist()
+        race_session = load_session(year, grand_prix, 'Race')
+        # tolist() on the raw array skips Series.tolist's per-element path
+        driver_codes = race_session.results['Abbreviation'].to_numpy().tolist()
         print(f"Found {len(driver_codes)} drivers for the event.")
     except Exception as e:
         print(f"Could not load race session for {year} {grand_prix}: {e}")
         return
 
+    try:
+        qualifying_session = load_session(year, grand_prix, 'Qualifying')
+    except Exception as e:
+        print(f"Could not load qualifying session for {year} {grand_prix}: {e}")
+        qualifying_session = None
+
+    # Two grouped passes give every driver's quali best and race median at
+    # once, instead of scanning the laps frame per driver via pick_driver.
+    if qualifying_session is not None:
+        quali_best = qualifying_session.laps.groupby('Driver')['LapTime'].min().dt.total_seconds()
+    else:
+        quali_best = pd.Series(dtype=float)
+
+    race_laps = race_session.laps
+    lap_times = race_laps['LapTime'].to_numpy()
+    pit_in = race_laps['PitInTime'].to_numpy()
+    pit_out = race_laps['PitOutTime'].to_numpy()
+    valid_mask = (
+        race_laps['IsAccurate'].to_numpy(dtype=bool)
+        & (lap_times == lap_times)
+        & (pit_in != pit_in)
+        & (pit_out != pit_out)
+    )
+    lap_seconds = lap_times[valid_mask].astype('timedelta64[ns]').view('i8') * 1e-9
+    race_medians = (
+        race_laps[valid_mask]
+        .assign(LapTimeSeconds=lap_seconds)
+        .groupby('Driver')['LapTimeSeconds'].median()
+    )
+
     results = []
     for driver_code in driver_codes:
-        print(f"Fetching data for {driver_code}...")
-        q_pace, r_pace = get_driver_paces(year, grand_prix, driver_code)
+        q_pace = quali_best.get(driver_code)
+        r_pace = race_medians.get(driver_code)
+        if pd.isna(q_pace):
+            q_pace = None
+        if pd.isna(r_pace):
+            r_pace = None
 
         if q_pace is not None and r_pace is not None:
             delta_percent = ((r_pace - q_pace) / q_pace) * 100
@@ -110,17 +152,30 @@ def analyze_quali_race_pace_delta(year, grand_prix):
     # Enhanced Insights
     average_delta = results_df['DeltaPercent'].mean()
     print(f"\n--- Insights (Average Delta: {average_delta:.2f}%) ---")
-    for _, row in results_df.iterrows():
-        driver = row['Driver']
-        delta = row['DeltaPercent']
-        if delta < average_delta - 1.5: # Significantly better than average
-            print(f"* {driver} ({delta:.2f}%): Exceptional race pace compared to the field. Maintained speed much better than average.")
-        elif delta > average_delta + 1.5: # Significantly worse than average
-            print(f"* {driver} ({delta:.2f}%): Pace drop-off was much higher than average. Potential issues with setup or tire degradation.")
-        else:
-            print(f"* {driver} ({delta:.2f}%): Performance is in line with the field average.")
+    # Classify every driver in one np.select pass and print the block with a
+    # single write instead of iterrows plus one print per row
+    deltas = results_df['DeltaPercent'].to_numpy()
+    insights = np.select(
+        [deltas < average_delta - 1.5, deltas > average_delta + 1.5],
+        ['Exceptional race pace compared to the field. Maintained speed much better than average.',
+         'Pace drop-off was much higher than average. Potential issues with setup or tire degradation.'],
+        default='Performance is in line with the field average.'
+    )
+    print('\n'.join(
+        f"* {driver} ({delta:.2f}%): {insight}"
+        for driver, delta, insight in zip(results_df['Driver'].to_numpy(), deltas, insights)
+    ))
+
+    # Visualization (plotting stack imported lazily so batch runs that stop
+    # at the insights above don't pay for it)
+    if not show_plots:
+        return
+
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import fastf1.plotting
 
-    # Visualization
+    fastf1.plotting.setup_mpl()
     plt.figure(figsize=(12, 7))
     sns.barplot(x='Driver', y='DeltaPercent', data=results_df, palette='coolwarm', hue='Driver', dodge=False)
     plt.axhline(average_delta, color='gold', linestyle='--', linewidth=1.2, label=f'Average Delta ({average_delta:.2f}%)')
@@ -1,38 +1,107 @@
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import fastf1
-import fastf1.plotting
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 # Enable the cache for faster data loading on subsequent runs
 fastf1.Cache.enable_cache('cache/')
 
-# Set up plotting style
-fastf1.plotting.setup_mpl()
+# Bounded so concurrent loads overlap network latency without hammering
+# the upstream APIs
+MAX_SESSION_WORKERS = 6
+
+# The schedule changes weekly at most; an hour of staleness is fine
+SCHEDULE_TTL = 3600
+_schedule_cache = {}
 
-def get_race_pace_data(year, grand_prix, driver_code):
+def get_event_schedule_cached(year):
     """
-    Helper function to get race pace for a single driver.
-    Returns race_pace (median lap time) or None if data is not available.
+    Returns the event schedule for a year, cached in-process and persisted
+    to a pickle sidecar so other runs within the TTL skip the fetch too.
     """
+    now = time.time()
+    cached = _schedule_cache.get(year)
+    if cached is not None and now - cached[0] < SCHEDULE_TTL:
+        return cached[1]
+
+    sidecar = os.path.join('cache', f'schedule_{year}.pkl')
     try:
-        race_session = fastf1.get_session(year, grand_prix, 'Race')
-        race_session.load(telemetry=False, weather=False, messages=False)
-        race_laps = race_session.laps.pick_driver(driver_code)
-
-        valid_race_laps = race_laps.loc[
-            (race_laps['IsAccurate'] == True) &
-            (race_laps['LapTime'].notna()) &
-            (race_laps['PitInTime'].isna()) &
-            (race_laps['PitOutTime'].isna())
-        ].copy()
-
-        if not valid_race_laps.empty:
-            valid_race_laps['LapTime(s)'] = valid_race_laps['LapTime'].dt.total_seconds()
-            return valid_race_laps['LapTime(s)'].median()
-        else:
-            return None
+        if os.path.exists(sidecar) and now - os.path.getmtime(sidecar) < SCHEDULE_TTL:
+            with open(sidecar, 'rb') as f:
+                schedule = pickle.load(f)
+            _schedule_cache[year] = (now, schedule)
+            return schedule
+    except (OSError, pickle.PickleError):
+        pass
+
+    schedule = fastf1.get_event_schedule(year)
+    _schedule_cache[year] = (now, schedule)
+    try:
+        with open(sidecar, 'wb') as f:
+            pickle.dump(schedule, f)
+    except OSError:
+        pass
+    return schedule
+
+def _to_seconds(lap_times):
+    """
+    Converts a timedelta64[ns] array to float seconds via an int64 view,
+    sidestepping the slower .dt.total_seconds() accessor path.
+    """
+    return lap_times.astype('timedelta64[ns]').view('i8') * 1e-9
+
+# fastf1's own cache stores raw API payloads, so every run still pays the
+# parse; these snapshots keep the parsed frames in columnar parquet and
+# memory-map them straight back in. The fastf1 version is stamped into the
+# filename so snapshots written by an older parser are ignored.
+PARSED_CACHE_DIR = os.path.join('cache', 'parsed')
+
+def _parsed_cache_path(year, grand_prix, session_type, kind):
+    stem = f"{year}_{grand_prix.replace(' ', '_')}_{session_type}_{kind}_fastf1-{fastf1.__version__}"
+    return os.path.join(PARSED_CACHE_DIR, stem + '.parquet')
+
+def get_session_frames(year, grand_prix, session_type='Race'):
+    """
+    Returns (laps, results) for a session, served from the parquet snapshot
+    when one exists so repeat runs skip the full fastf1 load and reparse.
+    """
+    laps_path = _parsed_cache_path(year, grand_prix, session_type, 'laps')
+    results_path = _parsed_cache_path(year, grand_prix, session_type, 'results')
+    try:
+        if os.path.exists(laps_path) and os.path.exists(results_path):
+            laps = pd.read_parquet(laps_path, memory_map=True)
+            results = pd.read_parquet(results_path, memory_map=True)
+            return laps, results
+    except Exception:
+        pass  # Snapshot unreadable; fall through to a full load
+
+    session = fastf1.get_session(year, grand_prix, session_type)
+    session.load(telemetry=False, weather=False, messages=False)
+    laps = session.laps
+    results = session.results
+    try:
+        os.makedirs(PARSED_CACHE_DIR, exist_ok=True)
+        pd.DataFrame(laps).to_parquet(laps_path)
+        pd.DataFrame(results).to_parquet(results_path)
+    except Exception:
+        pass  # Best-effort snapshot; the loaded frames are still good
+    return laps, results
+
+def _load_race_session(year, round_num, grand_prix):
+    """
+    Loads one race session's frames; returns (round_num, grand_prix, laps,
+    results) or None if the session could not be loaded.
+    """
+    print(f"Processing {grand_prix} (Round {round_num})...")
+    try:
+        laps, results = get_session_frames(year, grand_prix, 'Race')
+        return round_num, grand_prix, laps, results
     except Exception as e:
+        print(f"Could not load race session for {grand_prix}: {e}")
         return None
 
 def get_consistency_tier(std_dev):
@@ -46,59 +115,74 @@ def get_consistency_tier(std_dev):
     else:
         return 'Tier 3 (Inconsistent)'
 
-def analyze_consistency(year, driver_codes):
+def analyze_consistency(year, driver_codes, show_plots=True):
     """
     Analyzes the consistency of driver and constructor race pace throughout a season.
 
     Args:
         year (int): The year of the F1 season.
         driver_codes (list): A list of three-letter driver codes to analyze.
+        show_plots (bool): Render the consistency charts. Disable for headless
+            batch runs, which then never import the plotting stack at all.
     """
     print(f"\n--- Analyzing Driver and Constructor Race Pace Consistency for {year} ---")
 
-    schedule = fastf1.get_event_schedule(year)
-    race_events = schedule.loc[schedule['EventFormat'] != 'testing']
-    race_events = race_events.loc[race_events['EventFormat'] != 'practice']
+    schedule = get_event_schedule_cached(year)
+    race_events = schedule.loc[~schedule['EventFormat'].isin(('testing', 'practice'))]
 
     season_data = []
 
-    for round_num, event in race_events.iterrows():
-        grand_prix = event['EventName']
-        print(f"Processing {grand_prix} (Round {round_num})...")
-
-        try:
-            race_session = fastf1.get_session(year, grand_prix, 'Race')
-            race_session.load(telemetry=False, weather=False, messages=False)
-            results = race_session.results
-        except Exception as e:
-            print(f"Could not load race session for {grand_prix}: {e}")
+    # Fan the I/O-bound session loads out across threads, then run the cheap
+    # pandas reductions sequentially over the loaded sessions.
+    event_info = list(zip(race_events.index, race_events['EventName']))
+    with ThreadPoolExecutor(max_workers=MAX_SESSION_WORKERS) as executor:
+        loaded_sessions = [
+            loaded for loaded in executor.map(
+                lambda args: _load_race_session(year, *args), event_info
+            )
+            if loaded is not None
+        ]
+
+    for round_num, grand_prix, laps, results in loaded_sessions:
+        # The frames are already loaded, so compute every driver's median pace
+        # from the laps in one pass instead of re-loading the session per
+        # driver.
+        lap_times = laps['LapTime'].to_numpy()
+        pit_in = laps['PitInTime'].to_numpy()
+        pit_out = laps['PitOutTime'].to_numpy()
+        valid_mask = (
+            laps['IsAccurate'].to_numpy(dtype=bool)
+            & (lap_times == lap_times)
+            & (pit_in != pit_in)
+            & (pit_out != pit_out)
+        )
+        valid_laps = laps[valid_mask]
+        if valid_laps.empty:
             continue
 
-        all_race_paces = []
-        driver_paces = {}
-        for _, driver_row in results.iterrows():
-            driver_code = driver_row['Abbreviation']
-            pace = get_race_pace_data(year, grand_prix, driver_code)
-            if pace is not None:
-                all_race_paces.append(pace)
-                driver_paces[driver_code] = {
-                    'Pace': pace,
-                    'Team': driver_row['TeamName']
-                }
-        
-        if not all_race_paces:
-            continue
-            
-        fastest_race_pace = min(all_race_paces)
-
-        for driver_code, data in driver_paces.items():
+        # Sort once by driver and take per-group medians on the raw arrays -
+        # cheaper than a pandas groupby for this one-shot reduction
+        lap_seconds = _to_seconds(valid_laps['LapTime'].values)
+        drivers = valid_laps['Driver'].to_numpy()
+        order = np.argsort(drivers, kind='stable')
+        sorted_drivers = drivers[order]
+        unique_drivers, group_starts = np.unique(sorted_drivers, return_index=True)
+        group_medians = np.fromiter(
+            (np.median(group) for group in np.split(lap_seconds[order], group_starts[1:])),
+            dtype=np.float64, count=len(unique_drivers)
+        )
+        median_paces = pd.Series(group_medians, index=unique_drivers)
+        fastest_race_pace = group_medians.min()
+        teams = results.set_index('Abbreviation')['TeamName']
+
+        for driver_code, pace in median_paces.items():
             if driver_code in driver_codes:
-                race_pace_rel = (data['Pace'] - fastest_race_pace) / fastest_race_pace * 100
+                race_pace_rel = (pace - fastest_race_pace) / fastest_race_pace * 100
                 season_data.append({
                     'Round': round_num,
                     'GrandPrix': grand_prix,
                     'Driver': driver_code,
-                    'Team': data['Team'],
+                    'Team': teams.get(driver_code),
                     'RacePaceRelative': race_pace_rel
                 })
 
@@ -126,6 +210,17 @@ def analyze_consistency(year, driver_codes):
     print(constructor_stats)
 
     # --- Visualizations ---
+    if not show_plots:
+        return
+
+    # The plotting stack is imported lazily so report-only callers skip the
+    # matplotlib/seaborn import and backend init entirely
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import fastf1.plotting
+
+    fastf1.plotting.setup_mpl()
+
     # Driver Consistency
     plt.figure(figsize=(12, 8))
     sns.barplot(data=driver_stats, x='Driver', y='PaceStandardDeviation', hue='ConsistencyTier', palette='viridis', dodge=False)
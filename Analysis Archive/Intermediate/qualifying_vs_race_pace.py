@@ -1,44 +1,111 @@
+import functools
+
 import fastf1
-import fastf1.plotting
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 
 # Enable the cache for faster data loading on subsequent runs
 fastf1.Cache.enable_cache('/Users/prabhatm/Documents/GitHub/Formula1/cache') # Adjusted path for cache
 
-# Set up plotting style
-fastf1.plotting.setup_mpl()
+@functools.lru_cache(maxsize=1)
+def _ensure_mpl():
+    """
+    Applies the fastf1 matplotlib style once, at first plot. Keeping the
+    plotting stack out of module scope means batch runs that only need the
+    numeric summaries never pay for the matplotlib/seaborn imports.
+    """
+    import fastf1.plotting
+    fastf1.plotting.setup_mpl()
+
+class LazySession:
+    """
+    Thin wrapper around fastf1.get_session that defers the expensive
+    .load() until lap or result data is first accessed, so analyses that
+    never touch a session skip its parse cost entirely.
+    """
+
+    def __init__(self, year, grand_prix, session_type):
+        self._session = fastf1.get_session(year, grand_prix, session_type)
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._session.load(telemetry=False, weather=False, messages=False)
+            self._loaded = True
+
+    @property
+    def laps(self):
+        self._ensure_loaded()
+        return self._session.laps
+
+    @property
+    def results(self):
+        self._ensure_loaded()
+        return self._session.results
+
+    def __getattr__(self, name):
+        # Everything else (event metadata etc.) is available without loading
+        return getattr(self._session, name)
 
 def get_session_data(year, grand_prix):
     """
-    Loads the qualifying and race session data.
+    Returns lazily-loading qualifying and race sessions; data is fetched on
+    first access to .laps or .results.
     """
     try:
-        qualifying = fastf1.get_session(year, grand_prix, 'Q')
-        qualifying.load(telemetry=False, weather=False, messages=False)
-
-        race = fastf1.get_session(year, grand_prix, 'R')
-        race.load(telemetry=False, weather=False, messages=False)
+        qualifying = LazySession(year, grand_prix, 'Q')
+        race = LazySession(year, grand_prix, 'R')
         return qualifying, race
     except Exception as e:
         print(f"Error loading session data for {year} {grand_prix}: {e}")
         return None, None
 
-def analyze_qualifying_pace(session, driver_code):
+class DriverIndex:
+    """
+    Pre-sorts a laps frame by driver so per-driver slices are O(log n)
+    searchsorted lookups instead of a full-frame scan per pick_driver call.
+    Useful when several analyses pull laps for many drivers from the same
+    session.
+    """
+
+    def __init__(self, laps):
+        drivers = laps['Driver'].to_numpy()
+        self._order = np.argsort(drivers, kind='stable')
+        self._sorted_drivers = drivers[self._order]
+        self._laps = laps
+
+    def laps_for(self, driver_code):
+        lo = np.searchsorted(self._sorted_drivers, driver_code, side='left')
+        hi = np.searchsorted(self._sorted_drivers, driver_code, side='right')
+        return self._laps.iloc[self._order[lo:hi]]
+
+def analyze_qualifying_pace(driver_laps):
     """
-    Analyzes the qualifying pace for a single driver.
+    Analyzes the qualifying pace for a single driver's laps.
     Returns the best qualifying lap time in seconds.
     """
-    laps = session.laps.pick_driver(driver_code)
-    if laps.empty:
+    if driver_laps.empty:
         return None
-    fastest_lap = laps.pick_fastest()
+    fastest_lap = driver_laps.pick_fastest()
     if fastest_lap is not None:
         return fastest_lap['LapTime'].total_seconds()
     return None
 
+def _stint_slopes(rel_lap, lap_time_s, starts, ends):
+    """
+    Closed-form OLS slope cov(x, y) / var(x) for each stint slice of the
+    stint-sorted arrays. Works on contiguous slices so each stint is one
+    tight pair of array reductions with no per-stint frame construction.
+    """
+    out = np.empty(len(starts))
+    for i in range(len(starts)):
+        x = rel_lap[starts[i]:ends[i]]
+        y = lap_time_s[starts[i]:ends[i]]
+        x_centered = x - x.mean()
+        den = (x_centered * x_centered).sum()
+        out[i] = (x_centered * (y - y.mean())).sum() / den if den else 0.0
+    return out
+
 def analyze_race_stints(laps):
     """
     Analyzes race stints, calculating average pace and degradation.
@@ -51,63 +118,80 @@ def analyze_race_stints(laps):
         laps.loc[laps['PitOutTime'].notna(), 'Stint'] += 1 # Increment stint after pit out
         laps['Stint'] = laps['Stint'].fillna(1) # First stint
 
-    stints = laps.groupby('Stint')
-    stint_data = []
-
-    for stint_num, stint_laps in stints:
-        # Filter out pit in/out laps and inaccurate laps for pace calculation
-        valid_stint_laps = stint_laps.loc[
-            (stint_laps['IsAccurate'] == True) &
-            (stint_laps['LapTime'].notna()) &
-            (stint_laps['PitInTime'].isna()) &
-            (stint_laps['PitOutTime'].isna())
-        ].copy()
-
-        if len(valid_stint_laps) < 3:  # Need at least 3 valid laps for meaningful analysis
-            continue
-
-        compound = valid_stint_laps['Compound'].mode()[0] # Most frequent compound in stint
-        lap_times_seconds = valid_stint_laps['LapTime'].dt.total_seconds()
-        
-        # Remove outliers for average pace calculation (e.g., very slow laps due to traffic/safety car)
-        q_low = lap_times_seconds.quantile(0.05)
-        q_high = lap_times_seconds.quantile(0.95)
-        filtered_lap_times = lap_times_seconds[(lap_times_seconds > q_low) & (lap_times_seconds < q_high)]
-
-        if filtered_lap_times.empty:
-            continue
-
-        avg_pace = filtered_lap_times.mean()
-        
-        # Calculate degradation as the slope of a linear fit for valid laps
-        # Use LapNumber relative to stint start for degradation calculation
-        stint_lap_numbers = valid_stint_laps['LapNumber'] - valid_stint_laps['LapNumber'].min()
-        
-        try:
-            # Filter out NaNs from both series before polyfit
-            valid_indices = ~np.isnan(stint_lap_numbers) & ~np.isnan(lap_times_seconds)
-            if valid_indices.sum() > 1: # Need at least 2 points for a line
-                poly = np.polyfit(stint_lap_numbers[valid_indices], lap_times_seconds[valid_indices], 1)
-                degradation = poly[0] * 60 # Convert degradation to seconds per minute (per lap)
-            else:
-                degradation = 0.0
-        except (np.linalg.LinAlgError, ValueError):
-            degradation = 0.0
-
-        stint_data.append({
-            'Stint': stint_num,
-            'Compound': compound,
-            'Laps': len(valid_stint_laps),
-            'AvgPace': avg_pace,
-            'Degradation_s_per_lap': degradation
-        })
-
-    return pd.DataFrame(stint_data)
+    # Filter out pit in/out laps and inaccurate laps once for all stints.
+    # No .copy() on the slice - derived columns are attached via .assign,
+    # which shares the untouched columns instead of duplicating the frame.
+    valid_laps = laps.loc[
+        (laps['IsAccurate'] == True) &
+        (laps['LapTime'].notna()) &
+        (laps['PitInTime'].isna()) &
+        (laps['PitOutTime'].isna())
+    ]
+
+    if valid_laps.empty:
+        return pd.DataFrame()
+
+    # Dictionary-encode the string columns once so every groupby/mode below
+    # hashes small integer codes instead of Python strings
+    valid_laps = valid_laps.assign(**{
+        col: valid_laps[col].astype('category')
+        for col in ('Compound', 'Driver') if col in valid_laps.columns
+    })
+
+    valid_laps = valid_laps.assign(
+        LapTime_s=valid_laps['LapTime'].dt.total_seconds(),
+        RelLap=valid_laps['LapNumber'] - valid_laps.groupby('Stint')['LapNumber'].transform('min'),
+    )
+
+    stint_groups = valid_laps.groupby('Stint')
+
+    # Trim outlier laps (traffic/safety car) by blanking them to NaN, which
+    # the grouped mean skips - avoids a separate filtered groupby
+    q_low = stint_groups['LapTime_s'].transform(lambda s: s.quantile(0.05))
+    q_high = stint_groups['LapTime_s'].transform(lambda s: s.quantile(0.95))
+    trimmed_mask = (valid_laps['LapTime_s'] > q_low) & (valid_laps['LapTime_s'] < q_high)
+    valid_laps = valid_laps.assign(TrimmedTime=valid_laps['LapTime_s'].where(trimmed_mask))
+
+    # One grouped scan dispatches the frame-level stats: compound mode, lap
+    # count and trimmed average pace
+    stint_stats = valid_laps.groupby('Stint').agg(
+        Compound=('Compound', lambda s: s.mode().iat[0]),
+        Laps=('LapTime_s', 'size'),
+        AvgPace=('TrimmedTime', 'mean'),
+    )
+
+    # Degradation runs as a raw-array kernel over stint-sorted slices, so a
+    # season's worth of stints costs a handful of NumPy reductions each
+    stint_vals = valid_laps['Stint'].to_numpy()
+    order = np.argsort(stint_vals, kind='stable')
+    unique_stints, starts = np.unique(stint_vals[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    slopes = pd.Series(
+        _stint_slopes(
+            valid_laps['RelLap'].to_numpy(dtype=np.float64)[order],
+            valid_laps['LapTime_s'].to_numpy()[order],
+            starts, ends
+        ),
+        index=unique_stints
+    )
+    # Convert degradation to seconds per minute (per lap)
+    stint_stats['Degradation_s_per_lap'] = slopes.reindex(stint_stats.index).fillna(0.0) * 60
+
+    # Need at least 3 valid laps (and a trimmed average) for meaningful analysis
+    stint_stats = stint_stats.loc[
+        (stint_stats['Laps'] >= 3) & stint_stats['AvgPace'].notna()
+    ]
+
+    return stint_stats.reset_index()
 
 def plot_pace_comparison(driver_paces, title):
     """
     Plots qualifying vs. race pace for multiple drivers with annotations.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    _ensure_mpl()
     plot_df = pd.DataFrame(driver_paces).melt(id_vars='Driver', var_name='Session', value_name='LapTime(s)')
     plot_df = plot_df.dropna(subset=['LapTime(s)'])
 
@@ -133,6 +217,10 @@ def plot_quali_race_scatter(driver_paces, title):
     """
     Plots a scatter plot of qualifying pace vs. race pace delta.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    _ensure_mpl()
     plot_df = pd.DataFrame(driver_paces).dropna(subset=['Qualifying', 'Race'])
     if plot_df.empty:
         print("No data to plot for quali vs. race scatter.")
@@ -164,15 +252,23 @@ def plot_stint_analysis(driver_stints_data, title):
     """
     Plots the average pace, degradation, and laps for each stint of multiple drivers.
     """
-    all_stints_df = pd.DataFrame()
-    for driver, stints_df in driver_stints_data.items():
-        if not stints_df.empty:
-            stints_df['Driver'] = driver
-            all_stints_df = pd.concat([all_stints_df, stints_df], ignore_index=True)
-
-    if all_stints_df.empty:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import fastf1.plotting
+
+    _ensure_mpl()
+    # Collect the per-driver frames and concatenate once - concatenating
+    # inside the loop rebuilds the full frame every iteration
+    stint_parts = [
+        stints_df.assign(Driver=driver)
+        for driver, stints_df in driver_stints_data.items()
+        if not stints_df.empty
+    ]
+
+    if not stint_parts:
         print("No stint data to plot.")
         return
+    all_stints_df = pd.concat(stint_parts, ignore_index=True)
 
     fig, axes = plt.subplots(3, 1, figsize=(15, 18), sharex=True)
 
@@ -207,7 +303,7 @@ def plot_stint_analysis(driver_stints_data, title):
     plt.tight_layout()
     plt.show()
 
-def main():
+def main(show_plots=True):
     YEAR = 2025
     GRAND_PRIX = "British Grand Prix"
     # Define drivers to analyze: main, teammate, and rivals
@@ -232,12 +328,23 @@ def main():
 
     print(f"\n--- Analyzing Performance for {YEAR} {GRAND_PRIX} ---")
 
+    # Index each session's laps by driver once; per-driver slices below are
+    # then binary-search lookups rather than repeated full scans. The lazy
+    # sessions defer fastf1's load to this first laps access, so load
+    # failures surface here rather than in get_session_data.
+    try:
+        quali_index = DriverIndex(qualifying_session.laps)
+        race_index = DriverIndex(race_session.laps)
+    except Exception as e:
+        print(f"Error loading session data for {YEAR} {GRAND_PRIX}: {e}")
+        return
+
     for driver_code in drivers_to_analyze:
         print(f"Fetching data for {driver_code}...")
-        quali_pace = analyze_qualifying_pace(qualifying_session, driver_code)
-        
+        quali_pace = analyze_qualifying_pace(quali_index.laps_for(driver_code))
+
         # Ensure 'Stint' column is available before passing to analyze_race_stints
-        race_laps = race_session.laps.pick_driver(driver_code).pick_accurate()
+        race_laps = race_index.laps_for(driver_code).pick_accurate()
         if not race_laps.empty:
             # Assign stints based on pit stops
             race_laps['Stint'] = (race_laps['PitOutTime'].notna() | race_laps['PitInTime'].notna()).cumsum() + 1
@@ -266,10 +373,11 @@ def main():
             print("No race stint data.")
         print("\n")
 
-    # Plotting
-    plot_pace_comparison(driver_paces, f"{YEAR} {GRAND_PRIX} - Qualifying vs. Race Pace")
-    plot_quali_race_scatter(driver_paces, f"{YEAR} {GRAND_PRIX} - Quali vs. Race Pace Scatter")
-    plot_stint_analysis(driver_stints_data, f"{YEAR} {GRAND_PRIX}")
+    # Plotting (skipped entirely in headless batch runs)
+    if show_plots:
+        plot_pace_comparison(driver_paces, f"{YEAR} {GRAND_PRIX} - Qualifying vs. Race Pace")
+        plot_quali_race_scatter(driver_paces, f"{YEAR} {GRAND_PRIX} - Quali vs. Race Pace Scatter")
+        plot_stint_analysis(driver_stints_data, f"{YEAR} {GRAND_PRIX}")
 
     # Interpretations and Insights
     print("\n--- Key Insights ---")
@@ -11,6 +11,23 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style
 fastf1.plotting.setup_mpl()
 
+def _rolling_mean(values, window):
+    """
+    Rolling mean with min_periods=1 semantics from cumulative sums over
+    the raw array - one vectorized pass instead of pandas' Rolling
+    wrapper and per-window dispatch. NaN samples drop out of both the
+    sum and the valid count, matching rolling(...).mean().
+    """
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), dtype=np.float64)
+    ccount = np.cumsum(valid, dtype=np.float64)
+    sums = csum.copy()
+    counts = ccount.copy()
+    sums[window:] -= csum[:-window]
+    counts[window:] -= ccount[:-window]
+    counts[counts == 0] = np.nan  # All-NaN window stays NaN, not 0/0
+    return sums / counts
+
 def analyze_rolling_average_lap_times(year, grand_prix, session_type, driver_code, window_size=5):
     """
     Calculates and visualizes the rolling average of lap times for a single driver.
@@ -30,21 +47,26 @@ def analyze_rolling_average_lap_times(year, grand_prix, session_type, driver_cod
 
         driver_laps = session.laps.pick_driver(driver_code)
 
+        # No .copy() on the slice - the derived columns are attached via
+        # .assign, which shares the untouched columns instead of
+        # duplicating the whole frame
         valid_laps = driver_laps.loc[
             (driver_laps['IsAccurate'] == True) &
             (driver_laps['LapTime'].notna()) &
             (driver_laps['PitInTime'].isna()) &
             (driver_laps['PitOutTime'].isna())
-        ].copy()
+        ]
 
         if valid_laps.empty:
             print(f"No valid laps found for {driver_code} in {year} {grand_prix} {session_type}.")
             return
 
-        valid_laps['LapTime(s)'] = valid_laps['LapTime'].dt.total_seconds()
-
-        # Calculate rolling average
-        valid_laps['RollingAvgLapTime'] = valid_laps['LapTime(s)'].rolling(window=window_size, min_periods=1).mean()
+        lap_seconds = valid_laps['LapTime'].dt.total_seconds()
+        valid_laps = valid_laps.assign(**{
+            'LapTime(s)': lap_seconds,
+            # Calculate rolling average
+            'RollingAvgLapTime': _rolling_mean(lap_seconds.to_numpy(), window_size),
+        })
 
         plt.figure(figsize=(12, 7))
         sns.set_style("whitegrid")
@@ -97,11 +119,20 @@ def analyze_rolling_average_lap_times(year, grand_prix, session_type, driver_cod
         print(avg_lap_times_compound.to_string(index=False))
 
         # Tire Degradation Rates per Compound
+        # Closed-form OLS slope cov(x, y) / var(x) computed for all compounds
+        # at once from grouped deviation sums - no per-compound np.polyfit
+        # (which builds a Vandermonde matrix and solves lstsq for a line)
+        compounds = valid_laps['Compound']
+        lap_num_dev = valid_laps['LapNumber'] - valid_laps.groupby('Compound')['LapNumber'].transform('mean')
+        lap_time_dev = valid_laps['LapTime(s)'] - valid_laps.groupby('Compound')['LapTime(s)'].transform('mean')
+        slope_num = (lap_num_dev * lap_time_dev).groupby(compounds).sum()
+        slope_den = (lap_num_dev ** 2).groupby(compounds).sum()
+        counts = compounds.value_counts()
+
         degradation_info = []
-        for compound in valid_laps['Compound'].unique():
-            compound_data = valid_laps[valid_laps['Compound'] == compound]
-            if len(compound_data) > 1:
-                slope, intercept = np.polyfit(compound_data['LapNumber'], compound_data['LapTime(s)'], 1)
+        for compound in compounds.unique():
+            if counts.get(compound, 0) > 1 and slope_den[compound] != 0:
+                slope = slope_num[compound] / slope_den[compound]
                 degradation_info.append(f"{compound}: {slope:.3f} s/lap")
         if degradation_info:
             print("\nTire Degradation Rates (s/lap):")
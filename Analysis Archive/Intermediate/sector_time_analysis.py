@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
@@ -26,7 +29,65 @@ def get_most_recent_completed_race(year):
     most_recent_race = completed_races.iloc[-1]
     return most_recent_race['EventName'], most_recent_race['RoundNumber']
 
-def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]):
+# fastf1's cache keeps raw API payloads; every run still re-parses them and
+# recomputes add_distance(). Completed sessions never change, so the derived
+# per-driver telemetry is persisted as parquet and read straight back in.
+DERIVED_CACHE_DIR = os.path.join('cache', 'derived')
+
+def _telemetry_cache_path(year, grand_prix, session_type, driver_code):
+    stem = f"{year}_{grand_prix.replace(' ', '_')}_{session_type}_{driver_code}_fastest_telemetry"
+    return os.path.join(DERIVED_CACHE_DIR, stem + '.parquet')
+
+def get_fastest_lap_telemetry_cached(year, grand_prix, session_type, driver_code, fastest_lap):
+    """
+    Returns the fastest lap's telemetry with distance added, served from the
+    parquet sidecar when present so re-runs skip the telemetry parse.
+    """
+    cache_path = _telemetry_cache_path(year, grand_prix, session_type, driver_code)
+    try:
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+    except Exception:
+        pass  # Unreadable sidecar; fall through to a fresh parse
+
+    telemetry = fastest_lap.get_telemetry().add_distance()
+    try:
+        os.makedirs(DERIVED_CACHE_DIR, exist_ok=True)
+        pd.DataFrame(telemetry).to_parquet(cache_path)
+    except Exception:
+        pass  # Best-effort cache; the parsed telemetry is still good
+    return telemetry
+
+def _boundary_index(time_values, boundary):
+    """
+    Index of the telemetry sample closest to a sector boundary. TimeDelta is
+    monotonically increasing, so a binary search replaces the full
+    abs-difference scan (and its temporary Series) per lookup.
+    """
+    idx = np.searchsorted(time_values, np.timedelta64(boundary))
+    return min(idx, len(time_values) - 1)
+
+def _sector_slice(telemetry, time_values, start, end):
+    """
+    Telemetry rows with start <= TimeDelta < end, taken as a positional
+    slice via two binary searches instead of a full boolean mask.
+    """
+    lo = np.searchsorted(time_values, np.timedelta64(start))
+    hi = np.searchsorted(time_values, np.timedelta64(end))
+    return telemetry.iloc[lo:hi]
+
+def _emit_figure(fig, save_dir, name):
+    """
+    When save_dir is set, writes the figure to disk and closes it right
+    away, so batch runs hold at most one rendered figure in memory instead
+    of keeping all of them alive until the final plt.show().
+    """
+    if save_dir:
+        fig.savefig(os.path.join(save_dir, f'{name}.png'), dpi=100,
+                    bbox_inches='tight', facecolor='white', transparent=False)
+        plt.close(fig)
+
+def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str], save_dir=None):
     """
     Analyzes and visualizes sector times for a specific driver over a session,
     including a track map colored by speed and marked with sector boundaries.
@@ -36,118 +97,172 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
         grand_prix (str): The name of the Grand Prix (e.g., 'Monaco Grand Prix').
         session_type (str): The session type (e.g., 'Race', 'Qualifying').
         driver_codes (list[str]): A list of three-letter driver codes (e.g., ['VER', 'LEC']).
+        save_dir (str, optional): Directory to stream each figure to as PNG.
+            When set, figures are closed as soon as they are saved and no
+            interactive windows are shown.
     """
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+
     print(f"Loading data for {year} {grand_prix} - {session_type} for drivers {', '.join(driver_codes)}...")
 
     try:
         session = fastf1.get_session(year, grand_prix, session_type)
         session.load()
 
-        all_drivers_laps = pd.DataFrame()
-        fastest_laps_telemetry = {}
-
+        # One pass over the laps frame for every driver: a single isin mask
+        # plus the validity filter replaces the per-driver pick_driver
+        # re-scans (each of which walked the full frame)
+        laps_all = session.laps[session.laps['Driver'].isin(driver_codes)]
+        valid_all = laps_all.loc[
+            (laps_all['IsAccurate'] == True) &
+            (laps_all['LapTime'].notna()) &
+            (laps_all['PitInTime'].isna()) &
+            (laps_all['PitOutTime'].isna())
+        ]
+
+        drivers_with_laps = set(valid_all['Driver'].unique())
         for driver_code in driver_codes:
-            driver_laps = session.laps.pick_driver(driver_code)
-
-            # Filter for valid laps (accurate, not pit in/out, and with lap time)
-            valid_laps = driver_laps.loc[
-                (driver_laps['IsAccurate'] == True) &
-                (driver_laps['LapTime'].notna()) &
-                (driver_laps['PitInTime'].isna()) &
-                (driver_laps['PitOutTime'].isna())
-            ].copy()
-
-            if valid_laps.empty:
+            if driver_code not in drivers_with_laps:
                 print(f"No valid laps found for {driver_code} in {year} {grand_prix} {session_type}. Skipping this driver.")
-                continue
-
-            # Add driver code to the valid_laps DataFrame for later filtering
-            valid_laps['Driver'] = driver_code
-            all_drivers_laps = pd.concat([all_drivers_laps, valid_laps])
 
-            # Pick the fastest lap for detailed telemetry analysis for each driver
-            fastest_lap = valid_laps.pick_fastest()
-            telemetry = fastest_lap.get_telemetry().add_distance()
-            fastest_laps_telemetry[driver_code] = {'fastest_lap': fastest_lap, 'telemetry': telemetry}
-
-        if all_drivers_laps.empty:
+        if valid_all.empty:
             print(f"No valid laps found for any of the specified drivers in {year} {grand_prix} {session_type}.")
             return
 
-        # --- Track Map Visualization (for each driver in the list) ---
-        for driver_code, fastest_lap_data in fastest_laps_telemetry.items():
-            fastest_lap = fastest_lap_data['fastest_lap']
-            telemetry = fastest_lap_data['telemetry']
+        # Keep only the columns the summaries and plots below read, so the
+        # working frame carries a handful of columns instead of the full
+        # ~40-column laps schema
+        all_drivers_laps = valid_all[
+            ['Driver', 'LapNumber', 'Stint', 'Sector1Time', 'Sector2Time', 'Sector3Time']
+        ].reset_index(drop=True)
+        all_drivers_laps['Driver'] = all_drivers_laps['Driver'].astype('category')
+        for col in ('LapNumber', 'Stint'):
+            all_drivers_laps[col] = pd.to_numeric(all_drivers_laps[col], downcast='integer')
+
+        # Locate every driver's fastest lap with one grouped idxmin, then
+        # fetch telemetry only for those few rows. Each driver's telemetry is
+        # independent and I/O-bound, so the fetches run on a thread pool;
+        # all plotting stays on the main thread.
+        fastest_idx = valid_all.groupby('Driver')['LapTime'].idxmin()
+
+        def prep_driver(item):
+            driver_code, lap_idx = item
+            fastest_lap = valid_all.loc[lap_idx]
+            telemetry = get_fastest_lap_telemetry_cached(
+                year, grand_prix, session_type, driver_code, fastest_lap
+            )
+            return driver_code, fastest_lap, telemetry
 
-            min_speed = telemetry['Speed'].min()
-            max_speed = telemetry['Speed'].max()
+        fastest_laps_telemetry = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(fastest_idx))) as executor:
+            for driver_code, fastest_lap, telemetry in executor.map(prep_driver, fastest_idx.items()):
+                fastest_laps_telemetry[driver_code] = {'fastest_lap': fastest_lap, 'telemetry': telemetry}
+
+        # --- Track Map Visualization (one figure, one subplot per driver) ---
+        # A single figure with a shared colorbar amortizes the figure,
+        # axes and colorbar construction that used to run once per driver
+        if fastest_laps_telemetry:
+            n_maps = len(fastest_laps_telemetry)
+            fig, map_axes = plt.subplots(1, n_maps, figsize=(10 * n_maps, 10), squeeze=False)
+            map_axes = map_axes[0]
+            line = None
+
+            for ax, (driver_code, fastest_lap_data) in zip(map_axes, fastest_laps_telemetry.items()):
+                fastest_lap = fastest_lap_data['fastest_lap']
+                telemetry = fastest_lap_data['telemetry']
 
-            x = telemetry['X']
-            y = telemetry['Y']
+                min_speed = telemetry['Speed'].min()
+                max_speed = telemetry['Speed'].max()
 
-            sector1_end_time = fastest_lap['Sector1SessionTime']
-            sector2_end_time = fastest_lap['Sector2SessionTime']
-            sector3_end_time = fastest_lap['LapStartTime'] + fastest_lap['LapTime']
+                x = telemetry['X']
+                y = telemetry['Y']
 
-            telemetry['TimeDelta'] = telemetry['Time']
+                sector1_end_time = fastest_lap['Sector1SessionTime']
+                sector2_end_time = fastest_lap['Sector2SessionTime']
+                sector3_end_time = fastest_lap['LapStartTime'] + fastest_lap['LapTime']
 
-            idx_s1 = (telemetry['TimeDelta'] - sector1_end_time).abs().idxmin()
-            idx_s2 = (telemetry['TimeDelta'] - sector2_end_time).abs().idxmin()
-            idx_s3 = (telemetry['TimeDelta'] - sector3_end_time).abs().idxmin()
+                telemetry['TimeDelta'] = telemetry['Time']
 
-            s1_x, s1_y = telemetry.loc[idx_s1, ['X', 'Y']]
-            s2_x, s2_y = telemetry.loc[idx_s2, ['X', 'Y']]
-            s3_x, s3_y = telemetry.loc[idx_s3, ['X', 'Y']]
+                td = telemetry['TimeDelta'].to_numpy()
+                idx_s1 = _boundary_index(td, sector1_end_time)
+                idx_s2 = _boundary_index(td, sector2_end_time)
+                idx_s3 = _boundary_index(td, sector3_end_time)
 
-            fig, ax = plt.subplots(figsize=(10, 10))
-            ax.set_aspect('equal', adjustable='box')
+                s1_x, s1_y = telemetry.iloc[idx_s1][['X', 'Y']]
+                s2_x, s2_y = telemetry.iloc[idx_s2][['X', 'Y']]
+                s3_x, s3_y = telemetry.iloc[idx_s3][['X', 'Y']]
 
-            points = np.array([x, y]).T.reshape(-1, 1, 2)
-            segments = np.concatenate([points[:-1], points[1:]], axis=1)
-            norm = plt.Normalize(min_speed, max_speed)
-            lc = LineCollection(segments, cmap='viridis', norm=norm, linewidth=3)
-            lc.set_array(telemetry['Speed'])
-            line = ax.add_collection(lc)
+                ax.set_aspect('equal', adjustable='box')
 
-            cbar = fig.colorbar(line, ax=ax)
-            cbar.set_label('Speed (km/h)')
+                # Stack the shifted point views directly into the (N-1, 2, 2)
+                # segment buffer - skips the (N, 1, 2) reshape intermediate
+                # and the concatenate copy
+                pts = np.column_stack([x.to_numpy(), y.to_numpy()])
+                segments = np.stack([pts[:-1], pts[1:]], axis=1)
+                norm = plt.Normalize(min_speed, max_speed)
+                lc = LineCollection(segments, cmap='viridis', norm=norm, linewidth=3)
+                lc.set_array(telemetry['Speed'].to_numpy())
+                line = ax.add_collection(lc)
 
-            ax.plot(s1_x, s1_y, 'o', color='red', markersize=8, label='Sector 1 End')
-            ax.plot(s2_x, s2_y, 'o', color='orange', markersize=8, label='Sector 2 End')
-            ax.plot(s3_x, s3_y, 'o', color='purple', markersize=8, label='Lap End (Sector 3 End)')
+                ax.plot(s1_x, s1_y, 'o', color='red', markersize=8, label='Sector 1 End')
+                ax.plot(s2_x, s2_y, 'o', color='orange', markersize=8, label='Sector 2 End')
+                ax.plot(s3_x, s3_y, 'o', color='purple', markersize=8, label='Lap End (Sector 3 End)')
 
-            ax.set_title(f"{driver_code} Fastest Lap Speed & Sector Boundaries - {year} {grand_prix} {session_type}", fontsize=14)
-            ax.set_xlabel("X Coordinate")
-            ax.set_ylabel("Y Coordinate")
-            ax.legend()
-            plt.grid(True, linestyle='--', alpha=0.6)
-            plt.tight_layout()
-        
-        if not fastest_laps_telemetry:
+                ax.set_title(f"{driver_code} Fastest Lap Speed & Sector Boundaries - {year} {grand_prix} {session_type}", fontsize=14)
+                ax.set_xlabel("X Coordinate")
+                ax.set_ylabel("Y Coordinate")
+                ax.legend()
+                ax.grid(True, linestyle='--', alpha=0.6)
+
+            cbar = fig.colorbar(line, ax=map_axes.tolist(), shrink=0.6)
+            cbar.set_label('Speed (km/h)')
+            _emit_figure(fig, save_dir, 'track_maps')
+        else:
             print("Skipping track map visualization as no valid data for any driver was found.")
 
         # Numerical summary and new plots
-        # Extract sector times for all drivers
-        all_drivers_laps['Sector1(s)'] = all_drivers_laps['Sector1Time'].dt.total_seconds()
-        all_drivers_laps['Sector2(s)'] = all_drivers_laps['Sector2Time'].dt.total_seconds()
-        all_drivers_laps['Sector3(s)'] = all_drivers_laps['Sector3Time'].dt.total_seconds()
+        # Extract sector times for all drivers: one int64-view conversion of
+        # the three timedelta columns together instead of three separate
+        # .dt.total_seconds() passes
+        sector_times = all_drivers_laps[['Sector1Time', 'Sector2Time', 'Sector3Time']].to_numpy().astype('timedelta64[ns]')
+        sector_seconds = sector_times.view('i8').astype('float64') * 1e-9
+        # NaT views as INT64_MIN; put NaN back like .dt.total_seconds() would
+        sector_seconds[sector_times != sector_times] = np.nan
+        all_drivers_laps[['Sector1(s)', 'Sector2(s)', 'Sector3(s)']] = sector_seconds
+
+        # Every driver's mean per sector in one grouped scan; the small
+        # result frame feeds the printing, the delta plot and the bar plot
+        # instead of re-filtering and re-averaging per driver per sector
+        driver_sector_means = all_drivers_laps.groupby('Driver', observed=True)[
+            ['Sector1(s)', 'Sector2(s)', 'Sector3(s)']
+        ].mean()
+
+        # Partition the laps per driver once; each later per-driver slice is
+        # then a dict lookup instead of a full-frame boolean scan
+        driver_groups = dict(list(all_drivers_laps.groupby('Driver', sort=False, observed=True)))
 
         print(f"\n--- Sector Time Analysis Results for {', '.join(driver_codes)} - {year} {grand_prix} {session_type} ---")
         for driver_code in driver_codes:
-            driver_data = all_drivers_laps[all_drivers_laps['Driver'] == driver_code]
+            # An empty slice (not None) keeps the summary blocks below safe
+            # when a requested driver has no valid laps
+            driver_data = driver_groups.get(driver_code, all_drivers_laps.iloc[0:0])
             if not driver_data.empty:
                 print(f"\n--- Driver: {driver_code} ---")
                 for sector in ['Sector1(s)', 'Sector2(s)', 'Sector3(s)']:
-                    avg_time = driver_data[sector].mean()
-                    print(f"Average {sector}: {avg_time:.3f}s")
+                    print(f"Average {sector}: {driver_sector_means.loc[driver_code, sector]:.3f}s")
 
                 # Plotting Sector Times per Lap for all drivers (combined)
         fig2, axes2 = plt.subplots(1, 3, figsize=(18, 6), sharey=True)
         sectors_data = ['Sector1(s)', 'Sector2(s)', 'Sector3(s)']
         sector_titles = ['Sector 1', 'Sector 2', 'Sector 3']
 
+        # Plot the pre-grouped raw arrays directly - seaborn's lineplot
+        # re-groups and estimates per call, which is all overhead for a
+        # straight per-driver line
         for i, sector_col in enumerate(sectors_data):
-            sns.lineplot(x='LapNumber', y=sector_col, hue='Driver', data=all_drivers_laps, ax=axes2[i], marker='o', linestyle='-')
+            for drv, sub in driver_groups.items():
+                axes2[i].plot(sub['LapNumber'].to_numpy(), sub[sector_col].to_numpy(), marker='o', linestyle='-', label=drv)
             axes2[i].set_title(f'{sector_titles[i]} Times per Lap')
             axes2[i].set_xlabel('Lap Number')
             axes2[i].set_ylabel('Time (s)')
@@ -155,6 +270,7 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
             axes2[i].legend(title='Driver')
         plt.suptitle(f'Sector Times Progression - {year} {grand_prix} {session_type}', fontsize=16)
         plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+        _emit_figure(fig2, save_dir, 'sector_times_per_lap')
 
         # Calculate and print Ideal Lap Time
         ideal_lap_time = driver_data['Sector1(s)'].min() + \
@@ -162,36 +278,15 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
                             driver_data['Sector3(s)'].min()
         print(f"Ideal Lap Time: {ideal_lap_time:.3f}s")
 
-        # Calculate and print Delta to Fastest Sector (across all drivers)
-        for i, sector in enumerate(['Sector1(s)', 'Sector2(s)', 'Sector3(s)']):
-            fastest_sector_time = all_drivers_laps[sector].min()
-            delta = driver_data[sector].mean() - fastest_sector_time
-            print(f"Delta to Fastest {sector.replace('(s)', '')}: {delta:.3f}s")
-
-        # Calculate and print Average Speed per Sector (from fastest lap)
-        if driver_code in fastest_laps_telemetry:
-            fastest_lap_data = fastest_laps_telemetry[driver_code]
-            fastest_lap = fastest_lap_data['fastest_lap']
-            telemetry = fastest_lap_data['telemetry']
-
-            # This is an approximation, as exact sector boundaries in telemetry are not trivial
-            # We'll use the time deltas to approximate the telemetry points within each sector
-            sector1_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['LapStartTime']) & (telemetry['TimeDelta'] < fastest_lap['Sector1SessionTime'])]
-            sector2_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['Sector1SessionTime']) & (telemetry['TimeDelta'] < fastest_lap['Sector2SessionTime'])]
-            sector3_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['Sector2SessionTime']) & (telemetry['TimeDelta'] < fastest_lap['LapStartTime'] + fastest_lap['LapTime'])]
-
-            if not sector1_telemetry.empty:
-                print(f"Average Speed Sector 1 (Fastest Lap): {sector1_telemetry['Speed'].mean():.2f} km/h")
-            if not sector2_telemetry.empty:
-                print(f"Average Speed Sector 2 (Fastest Lap): {sector2_telemetry['Speed'].mean():.2f} km/h")
-            if not sector3_telemetry.empty:
-                print(f"Average Speed Sector 3 (Fastest Lap): {sector3_telemetry['Speed'].mean():.2f} km/h")
+        # Fastest time per sector across all drivers, computed once and
+        # reused everywhere below instead of re-scanning the column per use
+        fastest_sectors = all_drivers_laps[['Sector1(s)', 'Sector2(s)', 'Sector3(s)']].min()
 
         # Calculate and print Delta to Fastest Sector (across all drivers)
-        for i, sector in enumerate(['Sector1(s)', 'Sector2(s)', 'Sector3(s)']):
-            fastest_sector_time = all_drivers_laps[sector].min()
-            delta = driver_data[sector].mean() - fastest_sector_time
-            print(f"Delta to Fastest {sector.replace('(s)', '')}: {delta:.3f}s")
+        if driver_code in driver_sector_means.index:
+            for i, sector in enumerate(['Sector1(s)', 'Sector2(s)', 'Sector3(s)']):
+                delta = driver_sector_means.loc[driver_code, sector] - fastest_sectors[sector]
+                print(f"Delta to Fastest {sector.replace('(s)', '')}: {delta:.3f}s")
 
         # Calculate and print Average Speed per Sector (from fastest lap)
         if driver_code in fastest_laps_telemetry:
@@ -200,10 +295,12 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
             telemetry = fastest_lap_data['telemetry']
 
             # This is an approximation, as exact sector boundaries in telemetry are not trivial
-            # We'll use the time deltas to approximate the telemetry points within each sector
-            sector1_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['LapStartTime']) & (telemetry['TimeDelta'] < fastest_lap['Sector1SessionTime'])]
-            sector2_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['Sector1SessionTime']) & (telemetry['TimeDelta'] < fastest_lap['Sector2SessionTime'])]
-            sector3_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['Sector2SessionTime']) & (telemetry['TimeDelta'] < fastest_lap['LapStartTime'] + fastest_lap['LapTime'])]
+            # TimeDelta is sorted, so each sector is a positional slice found
+            # by binary search - no boolean mask allocation per sector
+            td = telemetry['TimeDelta'].to_numpy()
+            sector1_telemetry = _sector_slice(telemetry, td, fastest_lap['LapStartTime'], fastest_lap['Sector1SessionTime'])
+            sector2_telemetry = _sector_slice(telemetry, td, fastest_lap['Sector1SessionTime'], fastest_lap['Sector2SessionTime'])
+            sector3_telemetry = _sector_slice(telemetry, td, fastest_lap['Sector2SessionTime'], fastest_lap['LapStartTime'] + fastest_lap['LapTime'])
 
             if not sector1_telemetry.empty:
                 print(f"Average Speed Sector 1 (Fastest Lap): {sector1_telemetry['Speed'].mean():.2f} km/h")
@@ -213,8 +310,7 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
                 print(f"Average Speed Sector 3 (Fastest Lap): {sector3_telemetry['Speed'].mean():.2f} km/h")
 
         # Plotting Average Sector Times Comparison for all drivers
-        avg_sector_times_df = all_drivers_laps.groupby('Driver')[['Sector1(s)', 'Sector2(s)', 'Sector3(s)']].mean().reset_index()
-        avg_sector_times_df_melted = avg_sector_times_df.melt(id_vars='Driver', var_name='Sector', value_name='Average Time (s)')
+        avg_sector_times_df_melted = driver_sector_means.reset_index().melt(id_vars='Driver', var_name='Sector', value_name='Average Time (s)')
 
         fig3, ax3 = plt.subplots(figsize=(12, 7))
         sns.barplot(x='Sector', y='Average Time (s)', hue='Driver', data=avg_sector_times_df_melted, ax=ax3, palette='deep')
@@ -223,34 +319,34 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
         ax3.set_ylabel('Average Time (s)')
         ax3.grid(axis='y', linestyle='--', alpha=0.6)
         plt.tight_layout()
+        _emit_figure(fig3, save_dir, 'avg_sector_times')
 
         # Plotting Sector Time Consistency (Box Plots) for all drivers
         fig4, axes = plt.subplots(1, 3, figsize=(18, 6), sharey=True)
         sectors = ['Sector1(s)', 'Sector2(s)', 'Sector3(s)']
         titles = ['Sector 1 Consistency', 'Sector 2 Consistency', 'Sector 3 Consistency']
 
+        driver_labels = list(driver_groups)
         for i, sector in enumerate(sectors):
-            sns.boxplot(x='Driver', y=sector, data=all_drivers_laps, ax=axes[i], palette='pastel')
+            # Plain matplotlib boxplot on pre-grouped arrays, skipping
+            # seaborn's categorical machinery
+            axes[i].boxplot([sub[sector].to_numpy() for sub in driver_groups.values()], labels=driver_labels)
             axes[i].set_title(titles[i])
             axes[i].set_xlabel('Driver')
             axes[i].set_ylabel('Time (s)')
             axes[i].grid(axis='y', linestyle='--', alpha=0.6)
         plt.suptitle(f'Sector Time Consistency - {year} {grand_prix} {session_type}', fontsize=16)
         plt.tight_layout(rect=[0, 0.03, 1, 0.95]) # Adjust layout to prevent suptitle overlap
+        _emit_figure(fig4, save_dir, 'sector_consistency')
 
-        # Plotting Delta to Fastest Sector
-        delta_to_fastest_df = pd.DataFrame()
-        for driver_code in driver_codes:
-            driver_data = all_drivers_laps[all_drivers_laps['Driver'] == driver_code]
-            if not driver_data.empty:
-                for sector_col in ['Sector1(s)', 'Sector2(s)', 'Sector3(s)']:
-                    fastest_sector_time = all_drivers_laps[sector_col].min()
-                    avg_driver_sector_time = driver_data[sector_col].mean()
-                    delta = avg_driver_sector_time - fastest_sector_time
-                    delta_to_fastest_df = pd.concat([
-                        delta_to_fastest_df,
-                        pd.DataFrame([{'Driver': driver_code, 'Sector': sector_col.replace('(s)', ''), 'Delta': delta}])
-                    ])
+        # Plotting Delta to Fastest Sector: one broadcast subtraction of the
+        # fastest sector times from the precomputed means, stacked long
+        delta_to_fastest_df = (
+            (driver_sector_means - fastest_sectors)
+            .rename(columns=lambda c: c.replace('(s)', ''))
+            .stack().reset_index()
+        )
+        delta_to_fastest_df.columns = ['Driver', 'Sector', 'Delta']
 
         if not delta_to_fastest_df.empty:
             fig6, ax6 = plt.subplots(figsize=(12, 7))
@@ -261,34 +357,28 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
             ax6.axhline(0, color='grey', linestyle='--')
             ax6.grid(axis='y', linestyle='--', alpha=0.6)
             plt.tight_layout()
+            _emit_figure(fig6, save_dir, 'delta_to_fastest_sector')
 
-        # Plotting Average Speed per Sector
-        avg_speed_df = pd.DataFrame()
+        # Plotting Average Speed per Sector (same dict-accumulation pattern)
+        avg_speed_rows = []
         for driver_code in driver_codes:
             if driver_code in fastest_laps_telemetry:
                 fastest_lap_data = fastest_laps_telemetry[driver_code]
                 fastest_lap = fastest_lap_data['fastest_lap']
                 telemetry = fastest_lap_data['telemetry']
 
-                sector1_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['LapStartTime']) & (telemetry['TimeDelta'] < fastest_lap['Sector1SessionTime'])]
-                sector2_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['Sector1SessionTime']) & (telemetry['TimeDelta'] < fastest_lap['Sector2SessionTime'])]
-                sector3_telemetry = telemetry[(telemetry['TimeDelta'] >= fastest_lap['Sector2SessionTime']) & (telemetry['TimeDelta'] < fastest_lap['LapStartTime'] + fastest_lap['LapTime'])]
+                td = telemetry['TimeDelta'].to_numpy()
+                sector1_telemetry = _sector_slice(telemetry, td, fastest_lap['LapStartTime'], fastest_lap['Sector1SessionTime'])
+                sector2_telemetry = _sector_slice(telemetry, td, fastest_lap['Sector1SessionTime'], fastest_lap['Sector2SessionTime'])
+                sector3_telemetry = _sector_slice(telemetry, td, fastest_lap['Sector2SessionTime'], fastest_lap['LapStartTime'] + fastest_lap['LapTime'])
 
                 if not sector1_telemetry.empty:
-                    avg_speed_df = pd.concat([
-                        avg_speed_df,
-                        pd.DataFrame([{'Driver': driver_code, 'Sector': 'Sector 1', 'AvgSpeed': sector1_telemetry['Speed'].mean()}])
-                    ])
+                    avg_speed_rows.append({'Driver': driver_code, 'Sector': 'Sector 1', 'AvgSpeed': sector1_telemetry['Speed'].mean()})
                 if not sector2_telemetry.empty:
-                    avg_speed_df = pd.concat([
-                        avg_speed_df,
-                        pd.DataFrame([{'Driver': driver_code, 'Sector': 'Sector 2', 'AvgSpeed': sector2_telemetry['Speed'].mean()}])
-                    ])
+                    avg_speed_rows.append({'Driver': driver_code, 'Sector': 'Sector 2', 'AvgSpeed': sector2_telemetry['Speed'].mean()})
                 if not sector3_telemetry.empty:
-                    avg_speed_df = pd.concat([
-                        avg_speed_df,
-                        pd.DataFrame([{'Driver': driver_code, 'Sector': 'Sector 3', 'AvgSpeed': sector3_telemetry['Speed'].mean()}])
-                    ])
+                    avg_speed_rows.append({'Driver': driver_code, 'Sector': 'Sector 3', 'AvgSpeed': sector3_telemetry['Speed'].mean()})
+        avg_speed_df = pd.DataFrame(avg_speed_rows)
 
         if not avg_speed_df.empty:
             fig7, ax7 = plt.subplots(figsize=(12, 7))
@@ -298,6 +388,7 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
             ax7.set_ylabel('Average Speed (km/h)')
             ax7.grid(axis='y', linestyle='--', alpha=0.6)
             plt.tight_layout()
+            _emit_figure(fig7, save_dir, 'avg_speed_per_sector')
 
         # Interpretive Summary
         print("\n--- Interpreting Strengths and Weaknesses ---")
@@ -311,7 +402,7 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
         # Stint Analysis
         # Identify stints (laps between pit stops or start/end of session)
         stints = all_drivers_laps[['Driver', 'LapNumber', 'Stint', 'Sector1(s)', 'Sector2(s)', 'Sector3(s)']].copy()
-        stint_averages = stints.groupby(['Driver', 'Stint'])[['Sector1(s)', 'Sector2(s)', 'Sector3(s)']].mean().reset_index()
+        stint_averages = stints.groupby(['Driver', 'Stint'], observed=True)[['Sector1(s)', 'Sector2(s)', 'Sector3(s)']].mean().reset_index()
         stint_averages['TotalStintTime'] = stint_averages[['Sector1(s)', 'Sector2(s)', 'Sector3(s)']].sum(axis=1)
 
         if not stint_averages.empty:
@@ -325,8 +416,10 @@ def analyze_sector_times(year, grand_prix, session_type, driver_codes: list[str]
             ax5.set_ylabel('Average Total Stint Time (s)')
             ax5.grid(axis='y', linestyle='--', alpha=0.6)
             plt.tight_layout()
+            _emit_figure(fig5, save_dir, 'stint_times')
 
-        plt.show() # Show all plots at the end
+        if not save_dir:
+            plt.show() # Show all plots at the end
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -1,7 +1,10 @@
+import os
+
 import fastf1
 import fastf1.plotting
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 
 # Enable the cache for faster data loading on subsequent runs
 fastf1.Cache.enable_cache('cache/')
@@ -9,6 +12,38 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style
 fastf1.plotting.setup_mpl()
 
+# Fixed compound vocabulary so category codes are stable across sessions
+# (and across cached frames) instead of depending on which compounds happen
+# to appear in a given race
+COMPOUND_DTYPE = pd.CategoricalDtype(['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET', 'UNKNOWN'])
+
+# fastf1's cache keeps raw API payloads; the projected laps frame derived
+# below is persisted as parquet so re-runs skip session.load() entirely
+DERIVED_CACHE_DIR = os.path.join('cache', 'derived')
+
+def _laps_cache_path(year, grand_prix, session_type, driver_codes):
+    drivers = '-'.join(driver_codes)
+    stem = f"{year}_{grand_prix.replace(' ', '_')}_{session_type}_{drivers}_laps"
+    return os.path.join(DERIVED_CACHE_DIR, stem + '.parquet')
+
+def _move_mean(values, window):
+    """
+    Rolling mean with min_periods=1 semantics from cumulative sums over
+    the raw array - skips pandas' Rolling wrapper and window dispatch.
+    NaN samples (untimed laps) drop out of both the sum and the valid
+    count, matching rolling(...).mean(), instead of poisoning every
+    window from that point on.
+    """
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), dtype=np.float64)
+    ccount = np.cumsum(valid, dtype=np.float64)
+    sums = csum.copy()
+    counts = ccount.copy()
+    sums[window:] -= csum[:-window]
+    counts[window:] -= ccount[:-window]
+    counts[counts == 0] = np.nan  # All-NaN window stays NaN, not 0/0
+    return sums / counts
+
 def plot_strategy_dashboard(laps, stints, year, grand_prix, session_type):
     """Plots a comprehensive dashboard of the tire strategy for each driver on a single graph."""
     drivers = laps['Driver'].unique()
@@ -24,15 +59,18 @@ def plot_strategy_dashboard(laps, stints, year, grand_prix, session_type):
         
         # Lap times and rolling average
         driver_laps['LapTime(s)'] = driver_laps['LapTime'].dt.total_seconds()
-        driver_laps['RollingAvg'] = driver_laps['LapTime(s)'].rolling(window=3, min_periods=1).mean()
-
-        # Plotting lap times with compound markers
-        for compound, compound_laps in driver_laps.groupby('Compound'):
-            ax.plot(compound_laps['LapNumber'], compound_laps['RollingAvg'], 
-                    color=driver_colors(i),
-                    marker=compound_markers.get(compound, 'x'), 
-                    linestyle='-',
-                    label=f'{driver} - {compound}')
+        driver_laps['RollingAvg'] = _move_mean(driver_laps['LapTime(s)'].to_numpy(), 3)
+
+        # Plotting lap times with compound markers: one continuous line per
+        # driver plus one scatter batch per marker shape, instead of a
+        # separate Line2D artist for every (driver, compound) pair
+        lap_numbers = driver_laps['LapNumber'].to_numpy()
+        rolling_avg = driver_laps['RollingAvg'].to_numpy()
+        ax.plot(lap_numbers, rolling_avg, color=driver_colors(i), linestyle='-', label=driver)
+        marker_codes = driver_laps['Compound'].map(compound_markers).fillna('x').to_numpy()
+        for marker in pd.unique(marker_codes):
+            sel = marker_codes == marker
+            ax.scatter(lap_numbers[sel], rolling_avg[sel], color=driver_colors(i), marker=marker, s=36)
 
         # Pit stop markers
         pit_stops = driver_laps[driver_laps['PitOutTime'].notna()]
@@ -79,34 +117,62 @@ def analyze_tire_strategy_impact(year, grand_prix, session_type, driver_codes):
     print(f"Loading data for {year} {grand_prix} - {session_type} for drivers {driver_codes}...")
 
     try:
-        session = fastf1.get_session(year, grand_prix, session_type)
-        session.load(laps=True, telemetry=False, weather=False, messages=False)
-
-        laps = session.laps.pick_drivers(driver_codes)
-        laps['LapTime(s)'] = laps['LapTime'].dt.total_seconds()
-
-        stints = laps.groupby(['Driver', 'Stint']).agg(
+        cache_path = _laps_cache_path(year, grand_prix, session_type, driver_codes)
+        laps = None
+        try:
+            if os.path.exists(cache_path):
+                laps = pd.read_parquet(cache_path)
+        except Exception:
+            pass  # Unreadable sidecar; fall through to a full load
+
+        if laps is None:
+            session = fastf1.get_session(year, grand_prix, session_type)
+            session.load(laps=True, telemetry=False, weather=False, messages=False)
+
+            # Project down to the columns this analysis touches and shrink
+            # their dtypes - every groupby/mask/merge below then moves a
+            # fraction of the bytes of the ~40-column laps frame
+            laps = session.laps.pick_drivers(driver_codes)[
+                ['Driver', 'LapNumber', 'LapTime', 'Stint', 'Compound', 'IsAccurate', 'PitOutTime']
+            ].copy()
+            for col in ('LapNumber', 'Stint'):
+                laps[col] = pd.to_numeric(laps[col], downcast='integer')
+            laps['Driver'] = laps['Driver'].astype('category')
+            laps['Compound'] = laps['Compound'].astype(COMPOUND_DTYPE)
+            # Int64 nanosecond view instead of the .dt accessor path; NaT
+            # slots view as INT64_MIN and this frame is persisted below, so
+            # patch them back to NaN rather than caching sentinel garbage
+            lap_times = laps['LapTime'].to_numpy().astype('timedelta64[ns]')
+            lap_seconds = lap_times.view('i8') * 1e-9
+            lap_seconds[lap_times != lap_times] = np.nan
+            laps['LapTime(s)'] = lap_seconds
+
+            try:
+                os.makedirs(DERIVED_CACHE_DIR, exist_ok=True)
+                pd.DataFrame(laps).to_parquet(cache_path)
+            except Exception:
+                pass  # Best-effort cache; the loaded frame is still good
+
+        stints = laps.groupby(['Driver', 'Stint'], observed=True).agg(
             Compound=('Compound', 'first'),
             LapStart=('LapNumber', 'min'),
             LapEnd=('LapNumber', 'max'),
             StintLength=('LapNumber', 'count')
         ).reset_index().rename(columns={'Stint': 'StintNumber'})
 
-        avg_lap_times = []
-        for _, stint in stints.iterrows():
-            stint_laps = laps[
-                (laps['Driver'] == stint['Driver']) &
-                (laps['Stint'] == stint['StintNumber']) &
-                (laps['IsAccurate'] == True) &
-                (laps['LapTime'].notna())
-            ]
-            if not stint_laps.empty:
-                avg_time = stint_laps['LapTime(s)'].mean()
-                avg_lap_times.append(avg_time)
-            else:
-                avg_lap_times.append(np.nan)
-
-        stints['AvgLapTime(s)'] = avg_lap_times
+        # Average every stint in one grouped pass over the valid laps and
+        # merge the result back, instead of re-filtering the laps frame per
+        # stint row with iterrows
+        valid = laps[(laps['IsAccurate'] == True) & (laps['LapTime'].notna())]
+        avg_lap_times = (
+            valid.groupby(['Driver', 'Stint'], observed=True)['LapTime(s)'].mean()
+            .rename('AvgLapTime(s)').reset_index()
+        )
+        stints = stints.merge(
+            avg_lap_times,
+            left_on=['Driver', 'StintNumber'], right_on=['Driver', 'Stint'],
+            how='left'
+        ).drop(columns=['Stint'])
         stints.dropna(subset=['AvgLapTime(s)'], inplace=True)
 
         if stints.empty:
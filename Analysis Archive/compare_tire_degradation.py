@@ -1,3 +1,5 @@
+import os
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
@@ -11,6 +13,65 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style
 fastf1.plotting.setup_mpl()
 
+# Fixed compound vocabulary so category codes are stable across sessions
+# (and across cached frames) instead of depending on which compounds happen
+# to appear in a given race
+COMPOUND_DTYPE = pd.CategoricalDtype(['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET', 'UNKNOWN'])
+
+# fastf1's cache keeps raw API payloads, so session.load() still pays the
+# parse and timedelta coercion every run; these snapshots keep the
+# preprocessed laps frame in parquet instead
+PROCESSED_CACHE_DIR = os.path.join('cache', 'processed')
+
+def load_processed(year, grand_prix, session_type):
+    """
+    Returns the session's laps preprocessed for this analysis: projected to
+    the columns used here, with LapTime(s) precomputed and an IsValid flag
+    for the accurate/non-pit lap filter. Served from a parquet snapshot
+    under cache/processed/ when one exists, so repeat runs (and the other
+    configs sharing a session) skip session.load() entirely.
+    """
+    stem = f"{year}_{grand_prix.replace(' ', '_')}_{session_type}"
+    path = os.path.join(PROCESSED_CACHE_DIR, stem + '.parquet')
+    try:
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+    except Exception:
+        pass  # Unreadable snapshot; fall through to a full load
+
+    session = fastf1.get_session(year, grand_prix, session_type)
+    session.load(telemetry=False, weather=False, messages=False)
+    laps = session.laps
+    processed = laps[['Driver', 'LapNumber', 'Compound']].copy()
+    # Low-cardinality string columns as category codes - the groupbys and
+    # equality filters below then compare small integers, not objects, and
+    # the parquet snapshot round-trips the dtype
+    processed['Driver'] = processed['Driver'].astype('category')
+    processed['Compound'] = processed['Compound'].astype(COMPOUND_DTYPE)
+    lap_times = laps['LapTime'].to_numpy()
+    pit_in = laps['PitInTime'].to_numpy()
+    pit_out = laps['PitOutTime'].to_numpy()
+    # Int64 nanosecond view + one multiply instead of the slower
+    # .dt.total_seconds() accessor path; NaT slots are patched back to NaN
+    lap_seconds = lap_times.astype('timedelta64[ns]').view('i8') * 1e-9
+    lap_seconds[lap_times != lap_times] = np.nan
+    processed['LapTime(s)'] = lap_seconds
+    # One fused mask over the raw arrays (self-comparison is NaT-safe)
+    # instead of four chained pandas conditions and their temporaries
+    processed['IsPitOut'] = pit_out == pit_out
+    processed['IsValid'] = (
+        laps['IsAccurate'].to_numpy(dtype=bool)
+        & (lap_times == lap_times)
+        & (pit_in != pit_in)
+        & (pit_out != pit_out)
+    )
+    try:
+        os.makedirs(PROCESSED_CACHE_DIR, exist_ok=True)
+        processed.to_parquet(path, compression='snappy')
+    except Exception:
+        pass  # Best-effort snapshot; the processed frame is still good
+    return processed
+
 def compare_tire_degradation(analysis_configs):
     """
     Compares and visualizes tire degradation for multiple drivers or races.
@@ -46,17 +107,10 @@ def compare_tire_degradation(analysis_configs):
         print(f"Loading data for {year} {grand_prix} - {session_type} for driver {driver_code}...")
 
         try:
-            session = fastf1.get_session(year, grand_prix, session_type)
-            session.load()
+            laps = load_processed(year, grand_prix, session_type)
 
-            driver_laps = session.laps.pick_driver(driver_code)
-
-            valid_laps = driver_laps.loc[
-                (driver_laps['IsAccurate'] == True) &
-                (driver_laps['LapTime'].notna()) &
-                (driver_laps['PitInTime'].isna()) &
-                (driver_laps['PitOutTime'].isna())
-            ].copy()
+            driver_laps = laps[laps['Driver'] == driver_code]
+            valid_laps = driver_laps[driver_laps['IsValid']]
 
             if valid_laps.empty:
                 ax.set_title(f"No valid laps for {driver_code} in {year} {grand_prix}")
@@ -65,12 +119,26 @@ def compare_tire_degradation(analysis_configs):
                 print(f"No valid laps found for {driver_code} in {year} {grand_prix} {session_type}.")
                 continue
 
-            valid_laps['LapTime(s)'] = valid_laps['LapTime'].dt.total_seconds()
+            plot_data = valid_laps[['LapNumber', 'LapTime(s)', 'Compound']].reset_index(drop=True)
 
-            avg_lap_times = valid_laps.groupby('Compound')['LapTime(s)'].mean().reset_index()
-            avg_lap_times['LapTime(s)'] = avg_lap_times['LapTime(s)'].apply(lambda x: f"{x:.3f}s")
+            # One grouped scan yields the per-compound averages plus every
+            # sum the closed-form OLS slope needs (n, means, Σxy, Σx²) and
+            # the lap range for drawing the trend lines
+            compound_stats = plot_data.assign(
+                xy=plot_data['LapNumber'] * plot_data['LapTime(s)'],
+                x2=plot_data['LapNumber'] ** 2,
+            ).groupby('Compound', sort=False, observed=True).agg(
+                n=('LapNumber', 'size'),
+                mean_x=('LapNumber', 'mean'),
+                mean_y=('LapTime(s)', 'mean'),
+                sum_xy=('xy', 'sum'),
+                sum_x2=('x2', 'sum'),
+                x_min=('LapNumber', 'min'),
+                x_max=('LapNumber', 'max'),
+            )
 
-            plot_data = valid_laps[['LapNumber', 'LapTime(s)', 'Compound']].reset_index(drop=True)
+            avg_lap_times = compound_stats[['mean_y']].reset_index().rename(columns={'mean_y': 'LapTime(s)'})
+            avg_lap_times['LapTime(s)'] = avg_lap_times['LapTime(s)'].map("{:.3f}s".format)
 
             sns.scatterplot(
                 data=plot_data,
@@ -85,28 +153,37 @@ def compare_tire_degradation(analysis_configs):
                 ax=ax # Specify the subplot axis
             )
 
+            # Closed-form OLS slope cov(x, y) / var(x) for every compound at
+            # once from the grouped sums - no per-compound np.polyfit
+            # (which builds a Vandermonde matrix and solves lstsq for a line)
+            slope_num = compound_stats['sum_xy'] - compound_stats['n'] * compound_stats['mean_x'] * compound_stats['mean_y']
+            slope_den = compound_stats['sum_x2'] - compound_stats['n'] * compound_stats['mean_x'] ** 2
+
             degradation_info = []
-            for compound in plot_data['Compound'].unique():
-                compound_data = plot_data[plot_data['Compound'] == compound]
-                if len(compound_data) > 1:
-                    slope, intercept = np.polyfit(compound_data['LapNumber'], compound_data['LapTime(s)'], 1)
+            for compound, stats in compound_stats.iterrows():
+                if stats['n'] > 1 and slope_den[compound] != 0:
+                    slope = slope_num[compound] / slope_den[compound]
                     degradation_info.append(f"{compound}: {slope:.3f} s/lap")
-                    sns.regplot(
-                        data=compound_data,
-                        x='LapNumber',
-                        y='LapTime(s)',
+                    # Draw the trend directly from the precomputed fit
+                    # (line through the compound's mean point) instead of
+                    # sns.regplot, which would re-run the regression
+                    intercept = stats['mean_y'] - slope * stats['mean_x']
+                    trend_x = np.array([stats['x_min'], stats['x_max']])
+                    ax.plot(
+                        trend_x, slope * trend_x + intercept,
                         color=fastf1.plotting.COMPOUND_COLORS[compound],
-                        scatter=False,
-                        line_kws={'linestyle': '--', 'alpha': 0.7},
-                        ci=None,
-                        ax=ax # Specify the subplot axis
+                        linestyle='--', alpha=0.7
                     )
 
             if 'IsPitOut' in driver_laps.columns:
-                pit_stops = driver_laps[driver_laps['IsPitOut'] == True]
-                for _, pit_lap in pit_stops.iterrows():
-                    ax.axvline(x=pit_lap['LapNumber'], color='red', linestyle=':', linewidth=1.0, label='Pit Stop' if 'Pit Stop' not in ax.get_legend_handles_labels()[1] else "")
-                    ax.text(pit_lap['LapNumber'] + 0.5, ax.get_ylim()[1] * 0.95, 'Pit', rotation=90, verticalalignment='top', color='red', fontsize=8)
+                # All pit markers in one vlines call (a single LineCollection
+                # artist) instead of an iterrows loop of axvline calls
+                pit_lap_numbers = driver_laps.loc[driver_laps['IsPitOut'] == True, 'LapNumber'].to_numpy()
+                if len(pit_lap_numbers):
+                    ymin, ymax = ax.get_ylim()
+                    ax.vlines(pit_lap_numbers, ymin, ymax, color='red', linestyle=':', linewidth=1.0, label='Pit Stop')
+                    for lap_number in pit_lap_numbers:
+                        ax.text(lap_number + 0.5, ymax * 0.95, 'Pit', rotation=90, verticalalignment='top', color='red', fontsize=8)
             else:
                 print(f"'IsPitOut' column not found for {driver_code}. Skipping pit stop annotations.")
 
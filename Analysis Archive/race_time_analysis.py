@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
@@ -11,6 +14,62 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style
 fastf1.plotting.setup_mpl()
 
+# fastf1's cache keeps raw API payloads, so session.load() still pays the
+# parse and timedelta coercion every run; these snapshots keep the
+# preprocessed frames in parquet instead, which matters for the
+# season-long loop below that touches every completed race
+PROCESSED_CACHE_DIR = os.path.join('cache', 'processed')
+
+def load_processed(year, grand_prix, session_type):
+    """
+    Returns (laps, results) for a session, preprocessed for this analysis:
+    laps projected to the columns used here with LapTime(s) precomputed and
+    an IsValid flag for the accurate/non-pit lap filter, results projected
+    to abbreviation and position. Served from parquet snapshots under
+    cache/processed/ when they exist, so repeat runs skip session.load().
+    """
+    stem = f"{year}_{grand_prix.replace(' ', '_')}_{session_type}"
+    laps_path = os.path.join(PROCESSED_CACHE_DIR, stem + '_laps.parquet')
+    results_path = os.path.join(PROCESSED_CACHE_DIR, stem + '_results.parquet')
+    try:
+        if os.path.exists(laps_path) and os.path.exists(results_path):
+            return pd.read_parquet(laps_path), pd.read_parquet(results_path)
+    except Exception:
+        pass  # Unreadable snapshot; fall through to a full load
+
+    session = fastf1.get_session(year, grand_prix, session_type)
+    session.load(telemetry=False, weather=False, messages=False)
+    laps = session.laps
+    processed = laps[['Driver', 'LapNumber']].copy()
+    # Driver as category codes - the per-driver groupby then factorizes
+    # small integers instead of hashing strings, and the parquet snapshot
+    # round-trips the dtype
+    processed['Driver'] = processed['Driver'].astype('category')
+    lap_times = laps['LapTime'].to_numpy()
+    pit_in = laps['PitInTime'].to_numpy()
+    pit_out = laps['PitOutTime'].to_numpy()
+    # Int64 nanosecond view + one multiply instead of the slower
+    # .dt.total_seconds() accessor path; NaT slots are patched back to NaN
+    lap_seconds = lap_times.astype('timedelta64[ns]').view('i8') * 1e-9
+    lap_seconds[lap_times != lap_times] = np.nan
+    processed['LapTime(s)'] = lap_seconds
+    # One fused mask over the raw arrays (self-comparison is NaT-safe)
+    # instead of four chained pandas conditions and their temporaries
+    processed['IsValid'] = (
+        laps['IsAccurate'].to_numpy(dtype=bool)
+        & (lap_times == lap_times)
+        & (pit_in != pit_in)
+        & (pit_out != pit_out)
+    )
+    results = pd.DataFrame(session.results[['Abbreviation', 'Position']]).reset_index(drop=True)
+    try:
+        os.makedirs(PROCESSED_CACHE_DIR, exist_ok=True)
+        processed.to_parquet(laps_path, compression='snappy')
+        results.to_parquet(results_path, compression='snappy')
+    except Exception:
+        pass  # Best-effort snapshot; the loaded frames are still good
+    return processed, results
+
 def analyze_race_performance(year, grand_prix, session_type):
     """
     Analyzes and compares lap times, average pace, and consistency for top drivers
@@ -27,40 +86,32 @@ def analyze_race_performance(year, grand_prix, session_type):
     # print(f"\n--- Analyzing {year} {grand_prix} - {session_type} ---") # Suppress for season-long analysis
 
     try:
-        session = fastf1.get_session(year, grand_prix, session_type)
-        session.load()
+        laps, results = load_processed(year, grand_prix, session_type)
 
-        all_session_drivers = session.results['Abbreviation'].tolist()
+        all_session_drivers = results['Abbreviation'].tolist()
         if not all_session_drivers:
             # print(f"No drivers found for {year} {grand_prix} {session_type}.")
             return None
 
-        driver_performance_data = []
-
-        for driver_code in all_session_drivers:
-            driver_laps = session.laps.pick_drivers(driver_code)
+        # O(1) dict lookups in the driver loop instead of re-scanning the
+        # results frame with a boolean mask per driver
+        pos_by_code = dict(zip(results['Abbreviation'], results['Position']))
 
-            valid_laps = driver_laps.loc[
-                (driver_laps['IsAccurate'] == True) &
-                (driver_laps['LapTime'].notna()) &
-                (driver_laps['PitInTime'].isna()) &
-                (driver_laps['PitOutTime'].isna())
-            ].copy()
+        # One grouped pass over the valid laps instead of re-scanning the
+        # laps frame with a boolean mask for every driver
+        valid_laps = laps[laps['IsValid']]
+        pace_stats = valid_laps.groupby('Driver', sort=False, observed=True)['LapTime(s)'].agg(['mean', 'std'])
 
-            if valid_laps.empty:
-                continue
-
-            valid_laps['LapTime(s)'] = valid_laps['LapTime'].dt.total_seconds()
-            
-            avg_pace = valid_laps['LapTime(s)'].mean()
-            consistency_std = valid_laps['LapTime(s)'].std()
-
-            driver_performance_data.append({
+        driver_performance_data = [
+            {
                 'Driver': driver_code,
-                'AveragePace': avg_pace,
-                'ConsistencyStd': consistency_std,
-                'Position': session.results.loc[session.results['Abbreviation'] == driver_code, 'Position'].iloc[0]
-            })
+                'AveragePace': stats['mean'],
+                'ConsistencyStd': stats['std'],
+                'Position': pos_by_code[driver_code]
+            }
+            for driver_code, stats in pace_stats.iterrows()
+            if driver_code in pos_by_code
+        ]
 
         if not driver_performance_data:
             # print("No valid performance data found for any drivers in this session.")
@@ -117,15 +168,29 @@ def analyze_race_performance(year, grand_prix, session_type):
             race_insights['OverallMostConsistentAvgPace'] = overall_most_consistent_driver_data['AveragePace']
             race_insights['OverallMostConsistentConsistencyStd'] = overall_most_consistent_driver_data['ConsistencyStd']
 
-        # Cross-Category Insights (Top 5)
-        top_5_finishers_set = set(top_5_finishers['Driver'])
-        top_5_fastest_pace_set = set(top_5_fastest_pace['Driver'])
-        top_5_consistent_set = set(top_5_consistent['Driver'])
+        # Cross-Category Insights (Top 5): each top-5 list is encoded as a
+        # bitmask over driver ordinals, so the intersections and differences
+        # below are a handful of integer ops per race instead of building
+        # and hashing Python sets in the season-long loop
+        drv_ix = {code: i for i, code in enumerate(all_session_drivers)}
+
+        def _mask(drivers):
+            m = 0
+            for code in drivers:
+                m |= 1 << drv_ix[code]
+            return m
+
+        def _decode(mask):
+            return [code for code, i in drv_ix.items() if mask >> i & 1]
 
-        race_insights['DominantPerformers'] = list(top_5_finishers_set.intersection(top_5_fastest_pace_set, top_5_consistent_set))
-        race_insights['FastButNotFinished'] = list(top_5_fastest_pace_set.difference(top_5_finishers_set))
-        race_insights['ConsistentButNotFinished'] = list(top_5_consistent_set.difference(top_5_finishers_set))
-        race_insights['ResultWithoutPaceConsistency'] = list(top_5_finishers_set.difference(top_5_fastest_pace_set.union(top_5_consistent_set)))
+        finishers_mask = _mask(top_5_finishers['Driver'])
+        pace_mask = _mask(top_5_fastest_pace['Driver'])
+        consistent_mask = _mask(top_5_consistent['Driver'])
+
+        race_insights['DominantPerformers'] = _decode(finishers_mask & pace_mask & consistent_mask)
+        race_insights['FastButNotFinished'] = _decode(pace_mask & ~finishers_mask)
+        race_insights['ConsistentButNotFinished'] = _decode(consistent_mask & ~finishers_mask)
+        race_insights['ResultWithoutPaceConsistency'] = _decode(finishers_mask & ~(pace_mask | consistent_mask))
 
         return race_insights
 
@@ -135,6 +200,12 @@ def analyze_race_performance(year, grand_prix, session_type):
         return None
 
 
+def _analyze_event(args):
+    """Process-pool entry point; unpacks one (year, grand_prix, session_type) task."""
+    year, grand_prix, session_type = args
+    return analyze_race_performance(year, grand_prix, session_type)
+
+
 # --- Main Execution for Season-long Analysis ---
 if __name__ == "__main__":
     YEAR = 2025
@@ -142,19 +213,37 @@ if __name__ == "__main__":
     MAX_ROUND = 12 # Analyze up to round 12
 
     schedule = fastf1.get_event_schedule(YEAR)
-    today = pd.to_datetime('today').date()
-    completed_races = schedule.loc[(schedule['EventDate'].dt.date < today) & (schedule['RoundNumber'] >= 1) & (schedule['RoundNumber'] <= MAX_ROUND)]
+    # Compare datetime64 columns against a midnight Timestamp directly -
+    # .dt.date would materialize per-row Python date objects just to do
+    # the same comparison
+    today = pd.Timestamp.now().normalize()
+    completed_races = schedule.loc[(schedule['EventDate'] < today) & schedule['RoundNumber'].between(1, MAX_ROUND)]
 
     all_season_insights = []
 
     if completed_races.empty:
         print(f"No completed races found for {YEAR} up to round {MAX_ROUND}.")
     else:
-        for index, event in completed_races.iterrows():
-            grand_prix_name = event['EventName']
-            insights = analyze_race_performance(YEAR, grand_prix_name, SESSION_TYPE)
-            if insights:
-                all_season_insights.append(insights)
+        # Prime the caches for every race concurrently first - a cold-cache
+        # session load is a sequence of HTTP round trips, so IO threads
+        # overlap the latency and the analysis pool below hits warm local
+        # parquet snapshots instead of the network
+        def _prime(grand_prix_name):
+            try:
+                load_processed(YEAR, grand_prix_name, SESSION_TYPE)
+            except Exception as e:
+                print(f"Could not prefetch {grand_prix_name}: {e}")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(_prime, completed_races['EventName']))
+
+        # Each race is an independent load-and-reduce task, so fan the loop
+        # out across a process pool; workers that hit the processed parquet
+        # snapshots skip the download entirely. Results come back in
+        # schedule order because executor.map preserves input order.
+        event_args = [(YEAR, event['EventName'], SESSION_TYPE) for _, event in completed_races.iterrows()]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            all_season_insights = [insights for insights in executor.map(_analyze_event, event_args) if insights]
 
     print("\n==================================================")
     print(f"SEASON-LONG INSIGHTS SUMMARY ({YEAR} F1 Season - Rounds 1 to {MAX_ROUND})")
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
@@ -12,6 +14,11 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style
 fastf1.plotting.setup_mpl()
 
+@lru_cache(maxsize=None)
+def _driver_color(driver_code):
+    """Memoized driver_color so repeated comparisons don't re-derive the team palette."""
+    return fastf1.plotting.driver_color(driver_code)
+
 def analyze_telemetry_comparison(year, grand_prix, session_type, driver_codes, corner_name, start_distance, end_distance):
     """
     Analyzes and visualizes telemetry data for two drivers through a specific corner,
@@ -47,12 +54,22 @@ def analyze_telemetry_comparison(year, grand_prix, session_type, driver_codes, c
         driver2_tel = driver2_lap.get_telemetry().add_distance()
         
         # Get team colors
-        driver1_color = fastf1.plotting.driver_color(driver1_code)
-        driver2_color = fastf1.plotting.driver_color(driver2_code)
-
-        # Filter telemetry for the corner
-        tel1_segment = driver1_tel.loc[(driver1_tel['Distance'] >= start_distance) & (driver1_tel['Distance'] <= end_distance)]
-        tel2_segment = driver2_tel.loc[(driver2_tel['Distance'] >= start_distance) & (driver2_tel['Distance'] <= end_distance)]
+        driver1_color = _driver_color(driver1_code)
+        driver2_color = _driver_color(driver2_code)
+
+        # Filter telemetry for the corner. Distance is monotonic along a
+        # lap, so two binary searches and a positional slice replace the
+        # full-column boolean masks
+        dist1 = driver1_tel['Distance'].to_numpy()
+        dist2 = driver2_tel['Distance'].to_numpy()
+        tel1_segment = driver1_tel.iloc[
+            np.searchsorted(dist1, start_distance, side='left'):
+            np.searchsorted(dist1, end_distance, side='right')
+        ]
+        tel2_segment = driver2_tel.iloc[
+            np.searchsorted(dist2, start_distance, side='left'):
+            np.searchsorted(dist2, end_distance, side='right')
+        ]
 
         # Calculate delta time
         delta_time, ref_tel, com_tel = fastf1.utils.delta_time(driver1_lap, driver2_lap)
@@ -61,9 +78,14 @@ def analyze_telemetry_comparison(year, grand_prix, session_type, driver_codes, c
         print(f"\n--- Telemetry Summary for {corner_name} ({start_distance:.0f}m - {end_distance:.0f}m) ---")
         for i, tel_segment in enumerate([tel1_segment, tel2_segment]):
             driver_code = driver_codes[i]
-            apex_speed = tel_segment['Speed'].min()
-            time_to_apex = tel_segment[tel_segment['Speed'] == apex_speed]['Time'].iloc[0] - tel_segment['Time'].iloc[0]
-            exit_speed = tel_segment['Speed'].iloc[-1]
+            # argmin gives the apex position in one pass, instead of a min
+            # scan followed by a float-equality mask to recover the row
+            speeds = tel_segment['Speed'].to_numpy()
+            times = tel_segment['Time'].to_numpy()
+            apex_idx = speeds.argmin()
+            apex_speed = speeds[apex_idx]
+            time_to_apex = pd.Timedelta(times[apex_idx] - times[0])
+            exit_speed = speeds[-1]
             print(f"\nDriver: {driver_code}")
             print(f"  Apex Speed: {apex_speed:.2f} km/h")
             print(f"  Time to Apex: {time_to_apex.total_seconds()*1000:.0f} ms")
@@ -1,13 +1,77 @@
+import os
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
 import seaborn as sns
 import numpy as np
 fastf1.Cache.enable_cache('cache/')
 
 fastf1.plotting.setup_mpl()
 
+# Fixed compound vocabulary so category codes are stable across sessions
+# (and across cached frames) instead of depending on which compounds happen
+# to appear in a given race
+COMPOUND_DTYPE = pd.CategoricalDtype(['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET', 'UNKNOWN'])
+
+# fastf1's cache keeps raw API payloads, so session.load() still pays the
+# parse and timedelta coercion every run; these snapshots keep the
+# preprocessed laps frame in parquet instead
+PROCESSED_CACHE_DIR = os.path.join('cache', 'processed')
+
+def load_processed(year, grand_prix, session_type):
+    """
+    Returns the session's laps preprocessed for this analysis: projected to
+    the columns used here, with LapTime(s) precomputed and an IsValid flag
+    for the accurate/non-pit lap filter. Served from a parquet snapshot
+    under cache/processed/ when one exists, so repeat runs skip
+    session.load() entirely.
+    """
+    stem = f"{year}_{grand_prix.replace(' ', '_')}_{session_type}"
+    path = os.path.join(PROCESSED_CACHE_DIR, stem + '.parquet')
+    try:
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+    except Exception:
+        pass  # Unreadable snapshot; fall through to a full load
+
+    session = fastf1.get_session(year, grand_prix, session_type)
+    session.load(laps=True, telemetry=False, weather=False, messages=False)
+    laps = session.laps
+    processed = laps[['Driver', 'LapNumber', 'Compound']].copy()
+    # Low-cardinality string columns as category codes - the groupbys and
+    # equality filters below then compare small integers, not objects, and
+    # the parquet snapshot round-trips the dtype
+    processed['Driver'] = processed['Driver'].astype('category')
+    processed['Compound'] = processed['Compound'].astype(COMPOUND_DTYPE)
+    lap_times = laps['LapTime'].to_numpy()
+    pit_in = laps['PitInTime'].to_numpy()
+    pit_out = laps['PitOutTime'].to_numpy()
+    # Int64 nanosecond view + one multiply instead of the slower
+    # .dt.total_seconds() accessor path; NaT slots are patched back to NaN
+    lap_seconds = lap_times.astype('timedelta64[ns]').view('i8') * 1e-9
+    lap_seconds[lap_times != lap_times] = np.nan
+    processed['LapTime(s)'] = lap_seconds
+    # One fused mask over the raw arrays (self-comparison is NaT-safe)
+    # instead of four chained pandas conditions and their temporaries
+    processed['IsPitOut'] = pit_out == pit_out
+    processed['IsValid'] = (
+        laps['IsAccurate'].to_numpy(dtype=bool)
+        & (lap_times == lap_times)
+        & (pit_in != pit_in)
+        & (pit_out != pit_out)
+    )
+    try:
+        os.makedirs(PROCESSED_CACHE_DIR, exist_ok=True)
+        processed.to_parquet(path, compression='snappy')
+    except Exception:
+        pass  # Best-effort snapshot; the processed frame is still good
+    return processed
+
 def analyze_tire_degradation(year, grand_prix, session_type, driver_code):
     """
     Analyzes and visualizes tire degradation for a specific driver during a race.
@@ -21,83 +85,119 @@ def analyze_tire_degradation(year, grand_prix, session_type, driver_code):
     print(f"Loading data for {year} {grand_prix} - {session_type} for driver {driver_code}...")
 
     try:
-        # Load the session data
-        session = fastf1.get_session(year, grand_prix, session_type)
-        session.load()
+        # Load the preprocessed session laps (parquet snapshot when cached)
+        laps = load_processed(year, grand_prix, session_type)
 
         # Get all laps for the specified driver
-        driver_laps = session.laps.pick_driver(driver_code)
-
-        # Filter out unwanted laps (pit-in/out, invalid, safety car, etc.)
-        # We'll focus on 'Race' laps that are not 'Inlap' or 'Outlap' and are valid.
-        # Also, ensure 'LapTime' is not NaT (Not a Time)
-        valid_laps = driver_laps.loc[
-            (driver_laps['IsAccurate'] == True) &
-            (driver_laps['LapTime'].notna()) &
-            (driver_laps['PitInTime'].isna()) &  # Exclude pit-in laps
-            (driver_laps['PitOutTime'].isna())  # Exclude pit-out laps
-        ].copy()  # Use .copy() to avoid SettingWithCopyWarning
+        driver_laps = laps[laps['Driver'] == driver_code]
+
+        # Keep only the valid laps (not pit-in/out, accurate, timed) - the
+        # filter is precomputed by load_processed as the IsValid flag
+        valid_laps = driver_laps[driver_laps['IsValid']]
 
         if valid_laps.empty:
             print(f"No valid laps found for {driver_code} in {year} {grand_prix} {session_type}.")
             return
 
-        # Convert LapTime to total seconds for plotting
-        valid_laps['LapTime(s)'] = valid_laps['LapTime'].dt.total_seconds()
-
         # Calculate average lap times per compound
         # This provides a quick summary of performance on each tire type.
-        avg_lap_times = valid_laps.groupby('Compound')['LapTime(s)'].mean().reset_index()
-        avg_lap_times['LapTime(s)'] = avg_lap_times['LapTime(s)'].apply(lambda x: f"{x:.3f}s")
+        avg_lap_times = valid_laps.groupby('Compound', sort=False, observed=True)['LapTime(s)'].mean().reset_index()
+        avg_lap_times['LapTime(s)'] = avg_lap_times['LapTime(s)'].map("{:.3f}s".format)
 
-        # Prepare data for plotting
-        plot_data = valid_laps[['LapNumber', 'LapTime(s)', 'Compound']].reset_index(drop=True)
-
-        # Plotting
+        # Plotting - the scatter and the grouped stats read valid_laps
+        # directly; copying the three columns into a separate plot frame
+        # bought nothing
         plt.figure(figsize=(14, 8))
         sns.set_style("whitegrid")  # Set a nice background style
 
-        # Create a scatter plot with different colors for each compound
-        sns.scatterplot(
-            data=plot_data,
-            x='LapNumber',
-            y='LapTime(s)',
-            hue='Compound',
-            palette=fastf1.plotting.COMPOUND_COLORS,  # Use fastf1's predefined compound colors
+        # Snapshot fastf1's compound palette once for the compounds in
+        # play, rather than hitting the fastf1.plotting dict in the loops
+        palette = {c: fastf1.plotting.COMPOUND_COLORS[c] for c in valid_laps['Compound'].unique()}
+
+        # Create a scatter plot with different colors for each compound:
+        # one PathCollection with a per-row RGBA array mapped through the
+        # factorized compound codes, rather than seaborn building a
+        # separate collection (and draw pass) per compound. Rasterized so
+        # vector output and redraws pay for one raster image rather than a
+        # primitive per lap marker; axes and labels stay vector-crisp.
+        codes, compound_levels = pd.factorize(valid_laps['Compound'])
+        color_lookup = np.array([to_rgba(palette[compound]) for compound in compound_levels])
+        plotted = codes >= 0  # Rows with a compound outside the palette get no marker
+        plt.scatter(
+            valid_laps['LapNumber'].to_numpy()[plotted],
+            valid_laps['LapTime(s)'].to_numpy()[plotted],
+            c=color_lookup[codes[plotted]],
             s=100,  # Marker size
             alpha=0.8,  # Transparency
             edgecolor='w',  # White edge for markers
-            linewidth=0.5
+            linewidth=0.5,
+            rasterized=True
         )
+        # Proxy handles keep one legend entry per compound
+        compound_handles = [
+            Line2D([0], [0], marker='o', color='w', markerfacecolor=palette[compound],
+                   markersize=10, label=compound)
+            for compound in compound_levels
+        ]
 
         # Add a regression line for each compound to show the trend (degradation)
-        # This helps visualize the degradation rate for each tire type
+        # This helps visualize the degradation rate for each tire type.
+        # One grouped scan yields every sum the closed-form OLS slope
+        # cov(x, y) / var(x) needs plus each compound's lap range - no
+        # per-compound np.polyfit, and no sns.regplot re-running the fit
+        compound_stats = valid_laps.assign(
+            xy=valid_laps['LapNumber'] * valid_laps['LapTime(s)'],
+            x2=valid_laps['LapNumber'] ** 2,
+        ).groupby('Compound', sort=False, observed=True).agg(
+            n=('LapNumber', 'size'),
+            mean_x=('LapNumber', 'mean'),
+            mean_y=('LapTime(s)', 'mean'),
+            sum_xy=('xy', 'sum'),
+            sum_x2=('x2', 'sum'),
+            x_min=('LapNumber', 'min'),
+            x_max=('LapNumber', 'max'),
+        )
+        slope_num = compound_stats['sum_xy'] - compound_stats['n'] * compound_stats['mean_x'] * compound_stats['mean_y']
+        slope_den = compound_stats['sum_x2'] - compound_stats['n'] * compound_stats['mean_x'] ** 2
+
+        # All trend lines go into a single LineCollection artist instead of
+        # one regression line draw per compound
         degradation_info = []
-        for compound in plot_data['Compound'].unique():
-            compound_data = plot_data[plot_data['Compound'] == compound]
-            sns.regplot(
-                data=compound_data,
-                x='LapNumber',
-                y='LapTime(s)',
-                color=fastf1.plotting.COMPOUND_COLORS[compound],
-                scatter=False,  # Don't plot scatter points again
-                line_kws={'linestyle': '--', 'alpha': 0.7},  # Dashed line for trend
-                ci=None  # Do not show confidence interval
-            )
-            # Calculate degradation rate (slope of the regression line)
-            # The slope indicates how many seconds per lap the tire degrades.
-            if len(compound_data) > 1:
-                # Using numpy for polyfit to get the slope
-                slope, intercept = np.polyfit(compound_data['LapNumber'], compound_data['LapTime(s)'], 1)
+        trend_segments = []
+        trend_colors = []
+        for compound, stats in compound_stats.iterrows():
+            if stats['n'] > 1 and slope_den[compound] != 0:
+                slope = slope_num[compound] / slope_den[compound]
+                intercept = stats['mean_y'] - slope * stats['mean_x']
                 degradation_info.append(f"{compound}: {slope:.3f} s/lap")
+                trend_segments.append([
+                    (stats['x_min'], slope * stats['x_min'] + intercept),
+                    (stats['x_max'], slope * stats['x_max'] + intercept),
+                ])
+                trend_colors.append(palette[compound])
+        if trend_segments:
+            plt.gca().add_collection(
+                LineCollection(trend_segments, colors=trend_colors, linestyles='--', alpha=0.7)
+            )
 
         # Annotate pit stops
         # Mark pit stops on the plot for better context of tire changes.
         if 'IsPitOut' in driver_laps.columns:
-            pit_stops = driver_laps[driver_laps['IsPitOut'] == True]
-            for _, pit_lap in pit_stops.iterrows():
-                plt.axvline(x=pit_lap['LapNumber'], color='red', linestyle=':', linewidth=1.5, label='Pit Stop' if 'Pit Stop' not in plt.gca().get_legend_handles_labels()[1] else "")
-                plt.text(pit_lap['LapNumber'] + 0.5, plt.ylim()[1] * 0.95, 'Pit', rotation=90, verticalalignment='top', color='red')
+            # All pit markers in one LineCollection (x in data coordinates,
+            # y spanning the axes height) instead of a loop of axvline
+            # calls, each of which re-scanned the legend handles to
+            # deduplicate its label
+            pit_lap_numbers = driver_laps.loc[driver_laps['IsPitOut'] == True, 'LapNumber'].to_numpy()
+            if len(pit_lap_numbers):
+                ax = plt.gca()
+                pit_segments = [[(lap_number, 0), (lap_number, 1)] for lap_number in pit_lap_numbers]
+                ax.add_collection(LineCollection(
+                    pit_segments, colors='red', linestyles=':', linewidths=1.5,
+                    transform=ax.get_xaxis_transform(), label='Pit Stop'
+                ))
+                pit_text_y = plt.ylim()[1] * 0.95
+                for lap_number in pit_lap_numbers:
+                    plt.text(lap_number + 0.5, pit_text_y, 'Pit', rotation=90, verticalalignment='top', color='red')
         else:
             print("'IsPitOut' column not found in data. Skipping pit stop annotations.")
 
@@ -107,7 +207,9 @@ def analyze_tire_degradation(year, grand_prix, session_type, driver_code):
 
         # Create custom legend for average lap times and degradation
         # This combines the compound legend with average lap times for each.
-        handles, labels = plt.gca().get_legend_handles_labels()
+        other_handles, other_labels = plt.gca().get_legend_handles_labels()
+        handles = compound_handles + other_handles
+        labels = [handle.get_label() for handle in compound_handles] + other_labels
         new_labels = []
         for label in labels:
             if label in avg_lap_times['Compound'].values:
@@ -1,3 +1,7 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import fastf1
 import fastf1.plotting
 import pandas as pd
@@ -9,6 +13,31 @@ fastf1.Cache.enable_cache('cache/')
 # Set up plotting style (optional, as this script is more data-focused)
 fastf1.plotting.setup_mpl()
 
+@lru_cache(maxsize=8)
+def _cached_schedule(year):
+    """
+    Memoized event schedule - the prediction loop asks for the same year's
+    schedule once per round otherwise. Treat the returned frame as
+    read-only since every caller shares it.
+    """
+    return fastf1.get_event_schedule(year)
+
+def _pace_reductions(lap_seconds, drivers):
+    """
+    Single pass over the filtered session laps: returns the overall fastest
+    lap time and a dict of each driver's median, computed on the raw arrays
+    via one stable sort and contiguous group slices instead of re-filtering
+    the laps frame per driver.
+    """
+    order = np.argsort(drivers, kind='stable')
+    sorted_seconds = lap_seconds[order]
+    unique_drivers, group_starts = np.unique(drivers[order], return_index=True)
+    medians = {
+        driver: np.median(group)
+        for driver, group in zip(unique_drivers, np.split(sorted_seconds, group_starts[1:]))
+    }
+    return lap_seconds.min(), medians
+
 def get_race_data(year, round_num):
     """
     Helper function to get qualifying and race results, and race pace data for a given race.
@@ -17,7 +46,7 @@ def get_race_data(year, round_num):
     data = {}
     try:
         # Get event schedule to find Grand Prix name
-        schedule = fastf1.get_event_schedule(year)
+        schedule = _cached_schedule(year)
         event = schedule.loc[schedule['RoundNumber'] == round_num].iloc[0]
         grand_prix = event['EventName']
 
@@ -32,35 +61,34 @@ def get_race_data(year, round_num):
         # Get all drivers who participated in the race
         all_drivers = race_session.drivers
 
-        # Get fastest race pace for normalization
+        # Get fastest race pace for normalization, plus every driver's
+        # median pace from the same filtered laps in one raw-array pass
         all_race_laps = race_session.laps.pick_accurate().pick_track_status('1') # Only green flag laps
         if not all_race_laps.empty:
-            all_race_laps['LapTime(s)'] = all_race_laps['LapTime'].dt.total_seconds()
-            fastest_race_pace_overall = all_race_laps['LapTime(s)'].min()
+            lap_seconds = all_race_laps['LapTime'].to_numpy().astype('timedelta64[ns]').view('i8') * 1e-9
+            fastest_race_pace_overall, median_pace_by_driver = _pace_reductions(
+                lap_seconds, all_race_laps['Driver'].to_numpy()
+            )
         else:
             fastest_race_pace_overall = None
+            median_pace_by_driver = {}
+
+        # Position lookups built once, instead of re-scanning the results
+        # frames with a boolean mask for every driver
+        quali_pos_by_code = dict(zip(quali_session.results['Abbreviation'], quali_session.results['Position']))
+        race_pos_by_code = dict(zip(race_session.results['Abbreviation'], race_session.results['Position']))
 
         for driver_id in all_drivers:
             driver_code = race_session.get_driver(driver_id)['Abbreviation']
 
             # Qualifying Position
-            quali_pos = None
-            driver_quali_results = quali_session.results.loc[quali_session.results['Abbreviation'] == driver_code]
-            if not driver_quali_results.empty:
-                quali_pos = driver_quali_results.iloc[0]['Position']
+            quali_pos = quali_pos_by_code.get(driver_code)
 
             # Race Position
-            race_pos = None
-            driver_race_results = race_session.results.loc[race_session.results['Abbreviation'] == driver_code]
-            if not driver_race_results.empty:
-                race_pos = driver_race_results.iloc[0]['Position']
-
-            # Race Pace (median of valid laps)
-            race_pace = None
-            driver_race_laps = race_session.laps.pick_driver(driver_code).pick_accurate().pick_track_status('1')
-            if not driver_race_laps.empty:
-                driver_race_laps['LapTime(s)'] = driver_race_laps['LapTime'].dt.total_seconds()
-                race_pace = driver_race_laps['LapTime(s)'].median()
+            race_pos = race_pos_by_code.get(driver_code)
+
+            # Race Pace (median of valid laps, precomputed session-wide)
+            race_pace = median_pace_by_driver.get(driver_code)
 
             # Relative Race Pace
             race_pace_relative = None
@@ -76,11 +104,37 @@ def get_race_data(year, round_num):
         print(f"Error loading data for {year} Round {round_num}: {e}")
     return data
 
+# Past races are immutable, so the per-driver metrics for a round can be
+# materialized once and reread forever
+PREDICT_CACHE_DIR = os.path.join('cache', 'predict')
+
+def get_race_data_cached(year, round_num):
+    """
+    Disk-memoized get_race_data: serves the per-driver metrics for a past
+    round from a parquet sidecar when one exists, so repeat prediction
+    runs skip the two fastf1 session loads per round entirely.
+    """
+    cache_path = os.path.join(PREDICT_CACHE_DIR, f'predict_{year}_{round_num}.parquet')
+    try:
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path).to_dict(orient='index')
+    except Exception:
+        pass  # Unreadable sidecar; fall through to a full load
+
+    data = get_race_data(year, round_num)
+    if data:
+        try:
+            os.makedirs(PREDICT_CACHE_DIR, exist_ok=True)
+            pd.DataFrame.from_dict(data, orient='index').to_parquet(cache_path)
+        except Exception:
+            pass  # Best-effort cache; the computed data is still good
+    return data
+
 def get_next_race_to_predict(year):
     """
     Finds the next race to predict based on the current date.
     """
-    schedule = fastf1.get_event_schedule(year)
+    schedule = _cached_schedule(year)
     today = pd.to_datetime('today')
     
     # Find the first event that is in the future
@@ -106,75 +160,66 @@ def predict_winner_simple(year, grand_prix_round_to_predict, event_name):
     """
     print(f"\n--- Predicting Winner for {year} {event_name} (Round {grand_prix_round_to_predict}) ---")
 
-    all_drivers_performance = {}
+    # Collect data from previous races in the season. Each round is an
+    # independent I/O-bound load, so the fetches run concurrently on
+    # threads; the merge below stays single-threaded and in round order
+    # (executor.map preserves input order).
+    rounds = range(1, grand_prix_round_to_predict)
+    print(f"Collecting data from {year} Rounds {rounds.start}-{rounds.stop - 1}...")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        race_data_by_round = list(executor.map(lambda round_num: get_race_data_cached(year, round_num), rounds))
+
+    # Dense (driver, round) matrices with NaN for missing cells - the
+    # weighted averages and scores then fall out of whole-matrix
+    # arithmetic instead of a per-driver Python loop
+    driver_codes = sorted({code for race_data in race_data_by_round for code in race_data})
+    if not driver_codes:
+        print("No sufficient data to make a prediction.")
+        return
 
-    # Collect data from previous races in the season
-    for round_num in range(1, grand_prix_round_to_predict):
-        print(f"Collecting data from {year} Round {round_num}...")
-        race_data = get_race_data(year, round_num)
+    drv_ix = {code: i for i, code in enumerate(driver_codes)}
+    quali_mat = np.full((len(driver_codes), len(rounds)), np.nan)
+    race_mat = np.full_like(quali_mat, np.nan)
+    pace_mat = np.full_like(quali_mat, np.nan)
+    for j, race_data in enumerate(race_data_by_round):
         for driver_code, perf_data in race_data.items():
-            if driver_code not in all_drivers_performance:
-                all_drivers_performance[driver_code] = {
-                    'QualiPositions': [],
-                    'RacePositions': [],
-                    'RacePaceRelatives': []
-                }
-            
-            # Store performance with the round number for weighting
+            i = drv_ix[driver_code]
             if perf_data['QualiPosition'] is not None:
-                all_drivers_performance[driver_code]['QualiPositions'].append((round_num, perf_data['QualiPosition']))
+                quali_mat[i, j] = perf_data['QualiPosition']
             if perf_data['RacePosition'] is not None:
-                all_drivers_performance[driver_code]['RacePositions'].append((round_num, perf_data['RacePosition']))
+                race_mat[i, j] = perf_data['RacePosition']
             if perf_data['RacePaceRelative'] is not None:
-                all_drivers_performance[driver_code]['RacePaceRelatives'].append((round_num, perf_data['RacePaceRelative']))
-
-    driver_scores = []
-    for driver_code, data in all_drivers_performance.items():
-        
-        # Weighted average calculation - more recent races get higher weight
-        def weighted_avg(perf_list):
-            if not perf_list:
-                return np.nan
-            total_weight = sum(item[0] for item in perf_list) # sum of round numbers
-            weighted_sum = sum(item[1] * item[0] for item in perf_list) # value * round_num
-            return weighted_sum / total_weight
-
-        avg_quali_pos = weighted_avg(data['QualiPositions'])
-        avg_race_pos = weighted_avg(data['RacePositions'])
-        avg_race_pace_rel = weighted_avg(data['RacePaceRelatives'])
-
-        # Simple scoring: lower is better for positions and relative pace.
-        score = 0
-        weights = {'quali_pos': 0.4, 'race_pos': 0.4, 'race_pace': 0.2}
-
-        if not np.isnan(avg_quali_pos):
-            score += avg_quali_pos * weights['quali_pos']
-        else:
-            score += 20 * weights['quali_pos'] # Penalize missing quali data
-
-        if not np.isnan(avg_race_pos):
-            score += avg_race_pos * weights['race_pos']
-        else:
-            score += 20 * weights['race_pos'] # Penalize missing race data
-
-        if not np.isnan(avg_race_pace_rel):
-            score += avg_race_pace_rel * weights['race_pace']
-        else:
-            score += 10 * weights['race_pace'] # Penalize missing pace data
-
-        driver_scores.append({
-            'Driver': driver_code,
-            'AvgQualiPos': avg_quali_pos,
-            'AvgRacePos': avg_race_pos,
-            'AvgRacePaceRel': avg_race_pace_rel,
-            'PredictionScore': score
-        })
-
-    if not driver_scores:
-        print("No sufficient data to make a prediction.")
-        return
-
-    predictions_df = pd.DataFrame(driver_scores)
+                pace_mat[i, j] = perf_data['RacePaceRelative']
+
+    # Weighted average calculation - more recent races get higher weight;
+    # NaN cells contribute to neither the weighted sum nor the weight total
+    round_weights = np.arange(1, len(rounds) + 1, dtype=np.float64)
+
+    def weighted_avg(mat):
+        weight_totals = np.where(np.isnan(mat), 0.0, round_weights).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nansum(mat * round_weights, axis=1) / np.where(weight_totals == 0.0, np.nan, weight_totals)
+
+    avg_quali_pos = weighted_avg(quali_mat)
+    avg_race_pos = weighted_avg(race_mat)
+    avg_race_pace_rel = weighted_avg(pace_mat)
+
+    # Simple scoring: lower is better for positions and relative pace,
+    # with fixed penalties substituted for missing metrics.
+    weights = {'quali_pos': 0.4, 'race_pos': 0.4, 'race_pace': 0.2}
+    scores = (
+        np.where(np.isnan(avg_quali_pos), 20, avg_quali_pos) * weights['quali_pos']
+        + np.where(np.isnan(avg_race_pos), 20, avg_race_pos) * weights['race_pos']
+        + np.where(np.isnan(avg_race_pace_rel), 10, avg_race_pace_rel) * weights['race_pace']
+    )
+
+    predictions_df = pd.DataFrame({
+        'Driver': driver_codes,
+        'AvgQualiPos': avg_quali_pos,
+        'AvgRacePos': avg_race_pos,
+        'AvgRacePaceRel': avg_race_pace_rel,
+        'PredictionScore': scores
+    })
     predictions_df.sort_values(by='PredictionScore', ascending=True, inplace=True)
 
     print("\n--- Prediction Results (Top 5) ---")
@@ -199,7 +244,7 @@ if __name__ == "__main__":
         year = YEAR_TO_PREDICT
         race_round = ROUND_TO_PREDICT
         try:
-            schedule = fastf1.get_event_schedule(year)
+            schedule = _cached_schedule(year)
             event = schedule.loc[schedule['RoundNumber'] == race_round]
             if not event.empty:
                 event_name = event.iloc[0]['EventName']